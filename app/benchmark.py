@@ -0,0 +1,158 @@
+import argparse
+import asyncio
+import json
+import subprocess
+import time
+from datetime import datetime
+
+import numpy as np
+from config import CHUNKER, DATA_FILE_PATH, ELASTIC_INDEX_NAME, GROUND_TRUTH_PATH
+from services.cache import embedding_cache, search_cache
+from services.chunking import ChunkStats
+from services.corpus import iter_corpus
+from services.elastic_service import (
+    chunk_data,
+    close_es_client,
+    embed_query,
+    es_client,
+    load_or_build_local_index,
+    retrieve_candidates,
+    select_top_hits,
+)
+from utils.logger import logger
+
+
+def latency_stats(durations: list[float]) -> dict:
+    values = np.array(durations) * 1000
+    total = sum(durations)
+    return {
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "mean_ms": float(values.mean()),
+        "throughput_qps": len(durations) / total if total else 0.0,
+    }
+
+
+def rank_metrics(ranks: list[int | None]) -> dict:
+    return {
+        "hit_rate": sum(rank is not None for rank in ranks) / len(ranks),
+        "mrr": sum(1 / rank for rank in ranks if rank is not None) / len(ranks),
+    }
+
+
+async def run_backend(backend: str, ground_truth: list[dict]) -> dict:
+    # Measure cold lookups, not the memoization layers
+    embedding_cache.clear()
+    search_cache.clear()
+
+    timings = {"embedding": [], "retrieval": [], "fusion": [], "total": []}
+    ranks = []
+    for item in ground_truth:
+        start = time.perf_counter()
+        vector = await embed_query(item["question"])
+        embedded = time.perf_counter()
+        knn_hits, keyword_hits = await retrieve_candidates(
+            item["question"], vector, ELASTIC_INDEX_NAME, backend
+        )
+        retrieved = time.perf_counter()
+        top_hits = await select_top_hits(knn_hits, keyword_hits, ELASTIC_INDEX_NAME)
+        fused = time.perf_counter()
+
+        timings["embedding"].append(embedded - start)
+        timings["retrieval"].append(retrieved - embedded)
+        timings["fusion"].append(fused - retrieved)
+        timings["total"].append(fused - start)
+
+        urls = [hit["_source"]["url"] for hit in top_hits]
+        ranks.append(urls.index(item["url"]) + 1 if item["url"] in urls else None)
+
+    return {
+        "queries": len(ground_truth),
+        **rank_metrics(ranks),
+        "stages": {stage: latency_stats(values) for stage, values in timings.items()},
+    }
+
+
+def chunking_stats() -> dict:
+    """Chunks the corpus splits into with the configured chunker."""
+    stats = ChunkStats()
+    for _ in chunk_data(iter_corpus(DATA_FILE_PATH), stats=stats):
+        pass
+    return {"chunker": CHUNKER, **stats.summary()}
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main(args):
+    with open(args.ground_truth, "r") as f_in:
+        ground_truth = json.load(f_in)
+    if args.limit:
+        ground_truth = ground_truth[: args.limit]
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "chunking": chunking_stats(),
+        "backends": {},
+    }
+    try:
+        for backend in args.backends:
+            if backend == "local":
+                await load_or_build_local_index()
+            else:
+                await es_client.info()
+            logger.info(f"Benchmarking '{backend}' on {len(ground_truth)} questions")
+            results["backends"][backend] = await run_backend(backend, ground_truth)
+    finally:
+        await close_es_client()
+
+    with open(args.output, "w") as f_out:
+        json.dump(results, f_out, indent=2)
+
+    chunking = results["chunking"]
+    print(
+        f"{chunking['chunker']} chunker: {chunking['chunks']} chunks, "
+        f"mean {chunking.get('mean_tokens', 0):.0f} tokens"
+    )
+    for backend, result in results["backends"].items():
+        print(
+            f"{backend}: hit rate {result['hit_rate']:.3f}, MRR {result['mrr']:.3f}, "
+            f"p95 {result['stages']['total']['p95_ms']:.1f} ms"
+        )
+    print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark retrieval quality and latency on the ground truth."
+    )
+    parser.add_argument(
+        "--backends",
+        nargs="+",
+        choices=["local", "elasticsearch"],
+        default=["local"],
+        help="Search backends to benchmark (default: local)",
+    )
+    parser.add_argument(
+        "--ground-truth",
+        default=GROUND_TRUTH_PATH,
+        help=f"Ground truth JSON file (default: {GROUND_TRUTH_PATH})",
+    )
+    parser.add_argument(
+        "-n", "--limit", type=int, help="Only use the first N ground truth questions"
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="benchmark_results.json",
+        help="Output JSON file (default: benchmark_results.json)",
+    )
+    asyncio.run(main(parser.parse_args()))
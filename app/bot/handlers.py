@@ -1,15 +1,23 @@
+import asyncio
+
 from aiogram import F, Router
 from aiogram.enums import ChatAction, ParseMode
 from aiogram.filters import Command
 from aiogram.types import CallbackQuery, Message
-from database.models import save_dialog, save_feedback
-from services.llm_service import process_query
+from config import STREAM_ANSWERS
+from database.models import save_dialog, save_feedback, update_dialog_tokens
+from services.llm_service import TokenCounter, process_query
 from utils.logger import logger
+from utils.metrics import REQUESTS_IN_FLIGHT, span, start_request_timings
 
 from .keyboards import get_disabled_feedback_keyboard, get_feedback_keyboard
+from .streaming import AnswerStreamer
 
 router = Router()
 
+# Dialog updates waiting for timed-out LLM calls; referenced so they are not collected
+late_usage_updates: set[asyncio.Task] = set()
+
 
 @router.message(Command("start"))
 async def cmd_start(message: Message):
@@ -20,8 +28,27 @@ async def cmd_start(message: Message):
     )
 
 
+async def record_late_usage(dialog_id: int, token_counter: TokenCounter):
+    """Add the tokens of calls that finished after the dialog was saved."""
+    await token_counter.wait_pending()
+    try:
+        await update_dialog_tokens(
+            dialog_id,
+            token_counter.system_tokens,
+            token_counter.cache_read_tokens,
+            token_counter.cache_write_tokens,
+        )
+    except Exception as e:
+        logger.error(f"Error updating tokens of dialog {dialog_id}: {str(e)}")
+
+
 @router.message(F.text)
 async def handle_message(message: Message):
+    with REQUESTS_IN_FLIGHT.track_inprogress(), span("request"):
+        await answer_message(message)
+
+
+async def answer_message(message: Message):
     user_id = message.from_user.id
     query = message.text
 
@@ -30,25 +57,41 @@ async def handle_message(message: Message):
     try:
         await message.bot.send_chat_action(message.chat.id, ChatAction.TYPING)
 
-        answer, detected_language, token_counter = await process_query(query)
-        dialog_id = await save_dialog(
-            user_id,
-            query,
-            answer,
-            detected_language,
-            token_counter.main_prompt_tokens,
-            token_counter.system_tokens,
-            token_counter.output_tokens,
+        timings = start_request_timings()
+        streamer = AnswerStreamer(message) if STREAM_ANSWERS else None
+        answer, detected_language, token_counter = await process_query(
+            query, on_partial=streamer.update if streamer else None
         )
+        with span("db_save"):
+            dialog_id = await save_dialog(
+                user_id,
+                query,
+                answer,
+                detected_language,
+                token_counter.main_prompt_tokens,
+                token_counter.system_tokens,
+                token_counter.output_tokens,
+                token_counter.cache_read_tokens,
+                token_counter.cache_write_tokens,
+                {stage: round(duration, 4) for stage, duration in timings.items()},
+                token_counter.context_tokens_saved,
+            )
 
         logger.info(f"Processed query for user {user_id}. Dialog ID: {dialog_id}")
+        if token_counter.pending:
+            task = asyncio.create_task(record_late_usage(dialog_id, token_counter))
+            late_usage_updates.add(task)
+            task.add_done_callback(late_usage_updates.discard)
 
         # Send the final answer with the feedback keyboard
-        await message.answer(
-            answer,
-            parse_mode=ParseMode.MARKDOWN,
-            reply_markup=get_feedback_keyboard(dialog_id),
-        )
+        if streamer and streamer.sent_message:
+            await streamer.finish(answer, get_feedback_keyboard(dialog_id))
+        else:
+            await message.answer(
+                answer,
+                parse_mode=ParseMode.MARKDOWN,
+                reply_markup=get_feedback_keyboard(dialog_id),
+            )
 
     except Exception as e:
         logger.error(f"Error processing query for user {user_id}: {str(e)}")
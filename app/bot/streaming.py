@@ -0,0 +1,50 @@
+import time
+
+from aiogram.enums import ParseMode
+from aiogram.types import InlineKeyboardMarkup, Message
+from config import STREAM_EDIT_INTERVAL
+from utils.logger import logger
+
+
+class AnswerStreamer:
+    """Progressively edits a single Telegram message as the answer streams in.
+
+    Telegram allows roughly one edit per second per chat, so intermediate
+    edits are throttled to `interval` seconds. Partial text is sent without
+    parse mode because unfinished markdown would be rejected.
+    """
+
+    def __init__(self, message: Message, interval: float = STREAM_EDIT_INTERVAL):
+        self.message = message
+        self.interval = interval
+        self.sent_message: Message | None = None
+        self.last_text = ""
+        self.last_edit = 0.0
+
+    async def update(self, text: str):
+        if text == self.last_text:
+            return
+        now = time.monotonic()
+        if self.sent_message is None:
+            self.sent_message = await self.message.answer(text, parse_mode=None)
+        elif now - self.last_edit >= self.interval:
+            await self._edit(text, parse_mode=None)
+        else:
+            return
+        self.last_text = text
+        self.last_edit = now
+
+    async def finish(self, text: str, reply_markup: InlineKeyboardMarkup):
+        if not await self._edit(
+            text, parse_mode=ParseMode.MARKDOWN, reply_markup=reply_markup
+        ):
+            # Fall back to plain text so the keyboard is attached regardless
+            await self._edit(text, parse_mode=None, reply_markup=reply_markup)
+
+    async def _edit(self, text: str, **kwargs) -> bool:
+        try:
+            await self.sent_message.edit_text(text, **kwargs)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to edit streamed message: {str(e)}")
+            return False
@@ -10,5 +10,55 @@ DATABASE_URL = os.getenv("DATABASE_URL", "postgresql+asyncpg://user:password@db/
 SENTENCE_TRANSFORMERS_MODEL = os.getenv("SENTENCE_TRANSFORMERS_MODEL")
 ELASTIC_URL = os.getenv("ELASTIC_URL", "http://elasticsearch:9200")
 ELASTIC_INDEX_NAME = os.getenv("ELASTIC_INDEX_NAME", "my_index")
+# Legacy {url: page} JSON, or a streamed .jsonl corpus written by scripts/crawler.py
 DATA_FILE_PATH = os.getenv("DATA_FILE_PATH", "data/site_content.json")
+# Anthropic only caches prompt prefixes of at least 2048 tokens on Haiku models
+# (1024 on Sonnet and Opus). The system prompts marked for caching are well
+# below that, so on the default model cache_read/cache_write stay at zero
 LLM_MODEL = os.getenv("LLM_MODEL", "claude-3-haiku-20240307")
+# fixed until benchmark.py shows structured chunks match its hit rate and MRR
+CHUNKER = os.getenv("CHUNKER", "fixed")  # fixed | structured
+# Tokens per structured chunk, 0 = what the embedding model reads of a text
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "0"))
+CHUNK_HEADER_MAX_TOKENS = int(os.getenv("CHUNK_HEADER_MAX_TOKENS", "24"))
+CHUNK_OVERLAP_SENTENCES = int(os.getenv("CHUNK_OVERLAP_SENTENCES", "0"))
+INDEX_EMBED_BATCH_SIZE = int(os.getenv("INDEX_EMBED_BATCH_SIZE", "64"))
+INDEX_BULK_CHUNK_SIZE = int(os.getenv("INDEX_BULK_CHUNK_SIZE", "500"))
+INDEX_BULK_CONCURRENCY = int(os.getenv("INDEX_BULK_CONCURRENCY", "4"))
+RELEVANCE_MODE = os.getenv("RELEVANCE_MODE", "concurrent")  # concurrent | batch
+RELEVANCE_CONCURRENCY = int(os.getenv("RELEVANCE_CONCURRENCY", "5"))
+RELEVANCE_TIMEOUT = float(os.getenv("RELEVANCE_TIMEOUT", "15"))
+# What to do with a result whose relevance check timed out: keep | drop
+RELEVANCE_TIMEOUT_VERDICT = os.getenv("RELEVANCE_TIMEOUT_VERDICT", "keep")
+RELEVANCE_MAX_RESULTS = int(os.getenv("RELEVANCE_MAX_RESULTS", "0"))  # 0 = no limit
+# Budget for search results in the main prompt, in embedding-tokenizer tokens
+CONTEXT_MAX_TOKENS = int(os.getenv("CONTEXT_MAX_TOKENS", "1500"))
+CONTEXT_DEDUP_THRESHOLD = float(os.getenv("CONTEXT_DEDUP_THRESHOLD", "0.8"))
+RERANKER = os.getenv("RERANKER", "llm")  # llm | cross-encoder
+RERANKER_MODEL = os.getenv("RERANKER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANKER_THRESHOLD = float(os.getenv("RERANKER_THRESHOLD", "0.0"))
+RERANKER_BATCH_SIZE = int(os.getenv("RERANKER_BATCH_SIZE", "16"))
+QUERY_UNDERSTANDING = os.getenv("QUERY_UNDERSTANDING", "single")  # single | multi
+LANGUAGE_DETECTION_THRESHOLD = float(os.getenv("LANGUAGE_DETECTION_THRESHOLD", "0.7"))
+STREAM_ANSWERS = os.getenv("STREAM_ANSWERS", "true").lower() == "true"
+STREAM_EDIT_INTERVAL = float(os.getenv("STREAM_EDIT_INTERVAL", "1.0"))
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+ANSWER_CACHE_TTL = int(os.getenv("ANSWER_CACHE_TTL", "86400"))
+ANSWER_CACHE_MAX_SIZE = int(os.getenv("ANSWER_CACHE_MAX_SIZE", "1000"))
+ANSWER_CACHE_PERSIST = os.getenv("ANSWER_CACHE_PERSIST", "false").lower() == "true"
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "2048"))
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "1024"))
+RELEVANCE_CACHE_SIZE = int(os.getenv("RELEVANCE_CACHE_SIZE", "8192"))
+GROUND_TRUTH_PATH = os.getenv("GROUND_TRUTH_PATH", "data/ground-truth.json")
+INDEX_SMOKE_TEST_SIZE = int(os.getenv("INDEX_SMOKE_TEST_SIZE", "20"))
+INDEX_SMOKE_TEST_MIN_HIT_RATE = float(os.getenv("INDEX_SMOKE_TEST_MIN_HIT_RATE", "0.5"))
+INDEX_KEEP_PREVIOUS = int(os.getenv("INDEX_KEEP_PREVIOUS", "1"))
+# Seconds between checks of the live index version for rebuilds by other processes
+INDEX_VERSION_CHECK_INTERVAL = float(os.getenv("INDEX_VERSION_CHECK_INTERVAL", "60"))
+EMBEDDING_STORE_PATH = os.getenv("EMBEDDING_STORE_PATH", "data/embeddings")
+EMBEDDING_STORE_DTYPE = os.getenv("EMBEDDING_STORE_DTYPE", "float16")
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "elasticsearch")  # elasticsearch | local
+LOCAL_INDEX_PATH = os.getenv("LOCAL_INDEX_PATH", "data/local_index")
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+METRICS_PORT = int(os.getenv("METRICS_PORT", "8000"))
@@ -1,7 +1,19 @@
 from datetime import datetime
 
 from config import DATABASE_URL
-from sqlalchemy import BigInteger, Boolean, Column, DateTime, Integer, Text
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    Boolean,
+    Column,
+    DateTime,
+    Integer,
+    Text,
+    delete,
+    or_,
+    select,
+    text,
+)
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 
@@ -19,6 +31,10 @@ class Dialog(Base):
     main_prompt_token_count = Column(BigInteger)
     system_tokens_count = Column(BigInteger)
     output_tokens_count = Column(BigInteger)
+    cache_read_tokens_count = Column(BigInteger)
+    cache_write_tokens_count = Column(BigInteger)
+    context_tokens_saved_count = Column(BigInteger)  # Trimmed from the main prompt
+    stage_timings = Column(JSON)  # Seconds spent in each processing stage
     timestamp = Column(DateTime, default=datetime.utcnow)
 
 
@@ -31,13 +47,42 @@ class Feedback(Base):
     timestamp = Column(DateTime, default=datetime.utcnow)
 
 
+class CachedAnswer(Base):
+    __tablename__ = "answer_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    query = Column(Text, index=True)
+    embedding = Column(JSON)
+    answer = Column(Text)
+    index_version = Column(Text, index=True)  # Search index the answer came from
+    timestamp = Column(DateTime, default=datetime.utcnow)
+
+
 engine = create_async_engine(DATABASE_URL)
 AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+# Columns added after their table was first deployed. create_all never
+# alters existing tables, so they are added here on startup.
+COLUMN_MIGRATIONS = [
+    ("dialogs", "cache_read_tokens_count", "BIGINT"),
+    ("dialogs", "cache_write_tokens_count", "BIGINT"),
+    ("dialogs", "stage_timings", "JSON"),
+    ("dialogs", "context_tokens_saved_count", "BIGINT"),
+    ("answer_cache", "index_version", "TEXT"),
+]
+
 
 async def init_db():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        # Fresh SQLite databases (load tests) already get every column from create_all
+        if conn.dialect.name == "postgresql":
+            for table, column, column_type in COLUMN_MIGRATIONS:
+                await conn.execute(
+                    text(
+                        f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} {column_type}"
+                    )
+                )
 
 
 async def save_dialog(
@@ -48,6 +93,10 @@ async def save_dialog(
     main_prompt_token: int,
     system_tokens: int,
     output_tokens: int,
+    cache_read_tokens: int = 0,
+    cache_write_tokens: int = 0,
+    stage_timings: dict | None = None,
+    context_tokens_saved: int = 0,
 ):
     async with AsyncSessionLocal() as session:
         try:
@@ -59,6 +108,10 @@ async def save_dialog(
                 main_prompt_token_count=main_prompt_token,
                 system_tokens_count=system_tokens,
                 output_tokens_count=output_tokens,
+                cache_read_tokens_count=cache_read_tokens,
+                cache_write_tokens_count=cache_write_tokens,
+                stage_timings=stage_timings,
+                context_tokens_saved_count=context_tokens_saved,
             )
             session.add(dialog)
             await session.commit()
@@ -68,6 +121,24 @@ async def save_dialog(
             raise Exception(f"Failed to save dialog: {str(e)}")
 
 
+async def update_dialog_tokens(
+    dialog_id: int,
+    system_tokens: int,
+    cache_read_tokens: int,
+    cache_write_tokens: int,
+):
+    async with AsyncSessionLocal() as session:
+        try:
+            dialog = await session.get(Dialog, dialog_id)
+            dialog.system_tokens_count = system_tokens
+            dialog.cache_read_tokens_count = cache_read_tokens
+            dialog.cache_write_tokens_count = cache_write_tokens
+            await session.commit()
+        except Exception as e:
+            await session.rollback()
+            raise Exception(f"Failed to update dialog tokens: {str(e)}")
+
+
 async def save_feedback(dialog_id: int, is_positive: bool):
     async with AsyncSessionLocal() as session:
         try:
@@ -81,3 +152,56 @@ async def save_feedback(dialog_id: int, is_positive: bool):
         except Exception as e:
             await session.rollback()
             raise Exception(f"Failed to save feedback: {str(e)}")
+
+
+async def save_cached_answer(
+    query: str, embedding: list[float], answer: str, index_version: str
+):
+    async with AsyncSessionLocal() as session:
+        try:
+            await session.execute(
+                delete(CachedAnswer).where(CachedAnswer.query == query)
+            )
+            session.add(
+                CachedAnswer(
+                    query=query,
+                    embedding=embedding,
+                    answer=answer,
+                    index_version=index_version,
+                )
+            )
+            await session.commit()
+        except Exception as e:
+            await session.rollback()
+            raise Exception(f"Failed to save cached answer: {str(e)}")
+
+
+async def load_cached_answers(
+    since: datetime, index_version: str
+) -> list[CachedAnswer]:
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(CachedAnswer)
+            .where(CachedAnswer.timestamp >= since)
+            .where(CachedAnswer.index_version == index_version)
+            .order_by(CachedAnswer.timestamp)
+        )
+        return list(result.scalars())
+
+
+async def clear_cached_answers(keep_version: str | None = None):
+    """Delete cached answers, except those computed against `keep_version`."""
+    async with AsyncSessionLocal() as session:
+        try:
+            await session.execute(
+                delete(CachedAnswer).where(
+                    or_(
+                        CachedAnswer.index_version.is_(None),
+                        CachedAnswer.index_version != keep_version,
+                    )
+                )
+            )
+            await session.commit()
+        except Exception as e:
+            await session.rollback()
+            raise Exception(f"Failed to clear cached answers: {str(e)}")
@@ -0,0 +1,46 @@
+import argparse
+import asyncio
+
+from config import ELASTIC_INDEX_NAME
+from services.elastic_service import (
+    close_es_client,
+    find_or_create_index,
+    garbage_collect_indices,
+    rebuild_index,
+    sync_index,
+)
+from utils.logger import logger
+
+
+async def main(args):
+    try:
+        if args.rebuild:
+            await rebuild_index()
+        elif args.sync:
+            await sync_index(ELASTIC_INDEX_NAME)
+        elif args.gc:
+            await garbage_collect_indices()
+        else:
+            await find_or_create_index()
+    finally:
+        await close_es_client()
+    logger.info("Indexer finished")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the Elasticsearch index.")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Build a new index in the background and swap the alias to it",
+    )
+    group.add_argument(
+        "--sync",
+        action="store_true",
+        help="Incrementally update the live index from the data file",
+    )
+    group.add_argument(
+        "--gc", action="store_true", help="Delete old indices no longer in use"
+    )
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,170 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Stand-ins for Postgres and Elasticsearch must be configured before the app
+# modules read their settings. They override the environment so a load test
+# never writes to a real database unless --external is passed explicitly.
+if "--external" not in sys.argv:
+    database_path = os.path.join(tempfile.mkdtemp(), "load_test.db")
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{database_path}"
+    os.environ["SEARCH_BACKEND"] = "local"
+
+import numpy as np  # noqa: E402
+from bot import handlers  # noqa: E402
+from config import GROUND_TRUTH_PATH  # noqa: E402
+from database.models import init_db  # noqa: E402
+from services import llm_service  # noqa: E402
+from services.elastic_service import find_or_create_index  # noqa: E402
+from tests.fakes import FakeCallbackQuery, FakeMessage, LatencyChatModel  # noqa: E402
+from utils.logger import logger  # noqa: E402
+
+
+async def monitor_event_loop_lag(lags: list[float], stop: asyncio.Event):
+    interval = 0.01
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+async def simulate_user(user_id: int, question: str, telegram_latency: float) -> bool:
+    message = FakeMessage(user_id, question, telegram_latency)
+    await handlers.handle_message(message)
+    dialog_id = message.dialog_id()
+    if dialog_id is None:
+        return False
+    feedback = random.choice(["positive", "negative"])
+    callback = FakeCallbackQuery(
+        user_id, f"feedback:{dialog_id}:{feedback}", message.sent[-1]
+    )
+    await handlers.handle_feedback(callback)
+    return True
+
+
+async def run_level(
+    concurrency: int, questions: list[str], telegram_latency: float
+) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    failures = 0
+    lags = []
+    stop = asyncio.Event()
+
+    async def worker(i: int, question: str):
+        nonlocal failures
+        async with semaphore:
+            start = time.perf_counter()
+            if not await simulate_user(i, question, telegram_latency):
+                failures += 1
+            latencies.append(time.perf_counter() - start)
+
+    monitor = asyncio.create_task(monitor_event_loop_lag(lags, stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i, q) for i, q in enumerate(questions)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await monitor
+
+    latencies_ms = np.array(latencies) * 1000
+    lags_ms = np.array(lags or [0.0]) * 1000
+    return {
+        "concurrency": concurrency,
+        "requests": len(questions),
+        "failures": failures,
+        "throughput_rps": len(questions) / elapsed,
+        "latency_p50_ms": float(np.percentile(latencies_ms, 50)),
+        "latency_p95_ms": float(np.percentile(latencies_ms, 95)),
+        "latency_p99_ms": float(np.percentile(latencies_ms, 99)),
+        "loop_lag_p99_ms": float(np.percentile(lags_ms, 99)),
+        "loop_lag_max_ms": float(lags_ms.max()),
+    }
+
+
+async def main(args):
+    random.seed(args.seed)
+    llm_service.chat_model = LatencyChatModel(
+        latency=args.llm_latency, jitter=args.llm_jitter
+    )
+    if not args.cache:
+        llm_service.answer_cache = None
+
+    await init_db()
+    await find_or_create_index()
+
+    with open(args.ground_truth, "r") as f_in:
+        questions = [item["question"] for item in json.load(f_in)]
+
+    results = []
+    for concurrency in args.concurrency:
+        sample = random.sample(questions, min(args.requests, len(questions)))
+        logger.info(f"Running {len(sample)} requests at concurrency {concurrency}")
+        result = await run_level(concurrency, sample, args.telegram_latency)
+        results.append(result)
+        print(
+            f"concurrency {concurrency:>3}: {result['throughput_rps']:.2f} req/s, "
+            f"p95 {result['latency_p95_ms']:.0f} ms, "
+            f"loop lag max {result['loop_lag_max_ms']:.1f} ms, "
+            f"failures {result['failures']}"
+        )
+
+    with open(args.output, "w") as f_out:
+        json.dump({"args": vars(args), "results": results}, f_out, indent=2)
+    print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Load test the bot handlers with fake Telegram, LLM and database."
+    )
+    parser.add_argument(
+        "-c",
+        "--concurrency",
+        type=int,
+        nargs="+",
+        default=[1, 2, 4, 8, 16],
+        help="Concurrency levels to sweep (default: 1 2 4 8 16)",
+    )
+    parser.add_argument(
+        "-n",
+        "--requests",
+        type=int,
+        default=50,
+        help="Messages per concurrency level (default: 50)",
+    )
+    parser.add_argument(
+        "--llm-latency",
+        type=float,
+        default=0.5,
+        help="Mean fake LLM latency in seconds (default: 0.5)",
+    )
+    parser.add_argument(
+        "--llm-jitter",
+        type=float,
+        default=0.2,
+        help="Fake LLM latency standard deviation as a fraction of the mean",
+    )
+    parser.add_argument(
+        "--telegram-latency",
+        type=float,
+        default=0.05,
+        help="Fake Telegram API latency in seconds (default: 0.05)",
+    )
+    parser.add_argument(
+        "--cache", action="store_true", help="Keep the semantic answer cache enabled"
+    )
+    parser.add_argument(
+        "--external",
+        action="store_true",
+        help="Use DATABASE_URL and SEARCH_BACKEND from the environment instead of "
+        "a temporary SQLite database and the local search index",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--ground-truth", default=GROUND_TRUTH_PATH)
+    parser.add_argument("-o", "--output", default="load_test_results.json")
+    asyncio.run(main(parser.parse_args()))
@@ -5,10 +5,17 @@ from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 from aiogram.fsm.storage.memory import MemoryStorage
 from bot.handlers import router
-from config import BOT_TOKEN
+from config import BOT_TOKEN, METRICS_ENABLED, METRICS_PORT, SEARCH_BACKEND
 from database.models import init_db
-from services.elastic_service import es_client, find_or_create_index
+from services.answer_cache import answer_cache
+from services.cache import cache_stats
+from services.elastic_service import (
+    es_client,
+    find_or_create_index,
+    watch_index_version,
+)
 from utils.logger import logger
+from utils.metrics import start_metrics_server
 
 
 async def main():
@@ -17,21 +24,35 @@ async def main():
     dp = Dispatcher(storage=MemoryStorage())
     dp.include_router(router)
 
+    if METRICS_ENABLED:
+        start_metrics_server(METRICS_PORT, cache_stats)
+        logger.info(f"Serving metrics on port {METRICS_PORT}")
+
     await init_db()
     await find_or_create_index()
-
-    for _ in range(30):  # Пробуем в течение 30 секунд
-        try:
-            await es_client.info()
-            print("Elasticsearch is ready")
-            break
-        except Exception:
-            await asyncio.sleep(1)
-    else:
-        print("Elasticsearch is not available")
-        return
-
-    await dp.start_polling(bot)
+    if answer_cache:
+        await answer_cache.load()
+
+    version_watcher = None
+    if SEARCH_BACKEND == "elasticsearch":
+        for _ in range(30):  # Пробуем в течение 30 секунд
+            try:
+                await es_client.info()
+                print("Elasticsearch is ready")
+                break
+            except Exception:
+                await asyncio.sleep(1)
+        else:
+            print("Elasticsearch is not available")
+            return
+        # The indexer CLI can swap or sync the index while the bot is running
+        version_watcher = asyncio.create_task(watch_index_version())
+
+    try:
+        await dp.start_polling(bot)
+    finally:
+        if version_watcher:
+            version_watcher.cancel()
 
 
 if __name__ == "__main__":
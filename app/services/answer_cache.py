@@ -0,0 +1,151 @@
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from config import (
+    ANSWER_CACHE_ENABLED,
+    ANSWER_CACHE_MAX_SIZE,
+    ANSWER_CACHE_PERSIST,
+    ANSWER_CACHE_THRESHOLD,
+    ANSWER_CACHE_TTL,
+)
+from database.models import (
+    clear_cached_answers,
+    load_cached_answers,
+    save_cached_answer,
+)
+from services import cache
+from services.cache import caches, normalize_query
+from services.elastic_service import embed_query, index_rebuild_listeners
+from utils.logger import logger
+
+
+class SemanticAnswerCache:
+    """In-process answer cache matched by cosine similarity of query embeddings.
+
+    Entries expire after `ttl` seconds and the least recently used entry is
+    evicted once `max_size` is reached. Entries belong to the live search
+    index version and are dropped once it changes, including rebuilds made
+    by the indexer CLI. With `persist` set, entries are also written to
+    Postgres together with that version, and only entries for the current
+    version are reloaded on startup.
+    """
+
+    def __init__(
+        self,
+        threshold: float = ANSWER_CACHE_THRESHOLD,
+        ttl: int = ANSWER_CACHE_TTL,
+        max_size: int = ANSWER_CACHE_MAX_SIZE,
+        persist: bool = ANSWER_CACHE_PERSIST,
+    ):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_size = max_size
+        self.persist = persist
+        self.name = "answer"
+        # normalised query -> (unit vector, answer, created_at)
+        self.entries: OrderedDict[str, tuple[np.ndarray, str, float]] = OrderedDict()
+        self.version = cache.index_version
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, query: str) -> str | None:
+        key = normalize_query(query)
+        self._check_version()
+        self._expire()
+
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key][1]
+
+        if self.entries:
+            vector = await self._embed(query)
+            keys = list(self.entries)
+            matrix = np.stack([self.entries[k][0] for k in keys])
+            similarities = matrix @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] >= self.threshold:
+                logger.info(
+                    f"Answer cache hit for '{key}' via '{keys[best]}' ({similarities[best]:.3f})"
+                )
+                self.entries.move_to_end(keys[best])
+                self.hits += 1
+                return self.entries[keys[best]][1]
+
+        self.misses += 1
+        return None
+
+    async def put(self, query: str, answer: str):
+        key = normalize_query(query)
+        self._check_version()
+        vector = await self._embed(query)
+        self._store(key, vector, answer, time.time())
+        if self.persist:
+            try:
+                await save_cached_answer(
+                    key, vector.tolist(), answer, str(self.version)
+                )
+            except Exception as e:
+                logger.error(str(e))
+
+    async def load(self):
+        if not self.persist:
+            return
+        self._check_version()
+        since = datetime.utcnow() - timedelta(seconds=self.ttl)
+        for row in await load_cached_answers(since, str(self.version)):
+            created = row.timestamp.replace(tzinfo=timezone.utc).timestamp()
+            self._store(
+                row.query,
+                np.asarray(row.embedding, dtype=np.float32),
+                row.answer,
+                created,
+            )
+        logger.info(f"Loaded {len(self.entries)} cached answers")
+
+    async def invalidate(self):
+        """Drop entries for other index versions, in memory and in Postgres."""
+        self._check_version()
+        if self.persist:
+            await clear_cached_answers(keep_version=str(self.version))
+        logger.info(f"Answer cache invalidated for index version '{self.version}'")
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def _store(self, key: str, vector: np.ndarray, answer: str, created: float):
+        self.entries[key] = (vector, answer, created)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def _check_version(self):
+        if self.version != cache.index_version:
+            self.entries.clear()
+            self.version = cache.index_version
+
+    def _expire(self):
+        deadline = time.time() - self.ttl
+        for key in [
+            k for k, (_, _, created) in self.entries.items() if created < deadline
+        ]:
+            del self.entries[key]
+
+    async def _embed(self, text: str) -> np.ndarray:
+        vector = np.asarray(await embed_query(text), dtype=np.float32)
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+
+answer_cache = SemanticAnswerCache() if ANSWER_CACHE_ENABLED else None
+
+if answer_cache:
+    index_rebuild_listeners.append(answer_cache.invalidate)
+    caches.append(answer_cache)
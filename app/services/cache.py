@@ -0,0 +1,89 @@
+import re
+from collections import OrderedDict
+from typing import Any, Hashable
+
+from config import EMBEDDING_CACHE_SIZE, RELEVANCE_CACHE_SIZE, SEARCH_CACHE_SIZE
+
+# Identifies the search index contents cached entries were computed against.
+# It mirrors the version persisted with the index itself, so rebuilds made by
+# another process (the indexer CLI) are picked up too. Versioned caches drop
+# their entries the next time they are used after it changes.
+index_version: Hashable = None
+
+
+def set_index_version(version: Hashable) -> bool:
+    """Record the live index version, returning True if it changed."""
+    global index_version
+    if version == index_version:
+        return False
+    index_version = version
+    return True
+
+
+def normalize_query(query: str) -> str:
+    query = re.sub(r"[^\w\s]", " ", query.lower())
+    return " ".join(query.split())
+
+
+class LRUCache:
+    """Bounded LRU memoization layer with hit/miss counters.
+
+    When `versioned` is set, the cache is cleared as soon as the global
+    `index_version` differs from the version its entries were computed for.
+    """
+
+    def __init__(self, name: str, max_size: int, versioned: bool = True):
+        self.name = name
+        self.max_size = max_size
+        self.versioned = versioned
+        self.version = index_version
+        self.entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Any | None:
+        self._check_version()
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key: Hashable, value: Any):
+        self._check_version()
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def _check_version(self):
+        if self.versioned and self.version != index_version:
+            self.entries.clear()
+            self.version = index_version
+
+
+# query -> embedding depends only on the model, not on the indexed data
+embedding_cache = LRUCache("embedding", EMBEDDING_CACHE_SIZE, versioned=False)
+# search query -> fused top hits
+search_cache = LRUCache("search", SEARCH_CACHE_SIZE)
+# (query, doc_id) -> relevance verdict
+relevance_cache = LRUCache("relevance", RELEVANCE_CACHE_SIZE)
+
+caches = [embedding_cache, search_cache, relevance_cache]
+
+
+def cache_stats() -> dict[str, dict]:
+    return {cache.name: cache.stats() for cache in caches}
@@ -0,0 +1,168 @@
+import re
+from typing import Callable
+
+import numpy as np
+
+CountTokens = Callable[[str], int]
+
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+WORD_PIECE = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Word and punctuation count, a lower bound for word-piece tokenizers."""
+    return len(WORD_PIECE.findall(text))
+
+
+def fixed_chunks(content: str, chunk_size: int = 1000, overlap: int = 100) -> list[str]:
+    chunks = []
+    start = 0
+    while start < len(content):
+        end = start + chunk_size
+        chunks.append(content[start:end])
+        start = end - overlap
+    return chunks
+
+
+def compact_header(header: str, max_title_words: int = 30) -> str:
+    """Drop the repeated page title from a header.
+
+    Scraped headers read "<breadcrumbs> <title> <title> <intro>", because the
+    title appears both as the last breadcrumb and as the heading.
+    """
+    words = header.split()
+    for size in range(min(max_title_words, len(words) // 2), 1, -1):
+        for start in range(len(words) - 2 * size + 1):
+            if words[start : start + size] == words[start + size : start + 2 * size]:
+                return " ".join(words[: start + size] + words[start + 2 * size :])
+    return " ".join(words)
+
+
+def split_sentences(content: str) -> list[tuple[str, bool]]:
+    """Sentences of `content`, each flagged if it starts a new line.
+
+    Line breaks come from <br> tags and separate headings and list items, so
+    they always end a sentence.
+    """
+    sentences = []
+    for line in content.split("\n"):
+        for i, sentence in enumerate(SENTENCE_END.split(line.strip())):
+            if sentence:
+                sentences.append((sentence, i == 0))
+    return sentences
+
+
+def split_words(
+    text: str, max_tokens: int, count_tokens: CountTokens
+) -> list[tuple[str, int]]:
+    """Cut `text` between words into pieces of at most `max_tokens`."""
+    pieces = []
+    words, tokens = [], 0
+    for word in text.split():
+        word_tokens = count_tokens(word)
+        if words and tokens + word_tokens > max_tokens:
+            pieces.append((" ".join(words), tokens))
+            words, tokens = [], 0
+        words.append(word)
+        tokens += word_tokens
+    if words:
+        pieces.append((" ".join(words), tokens))
+    return pieces
+
+
+def structured_chunks(
+    header: str,
+    content: str,
+    max_tokens: int,
+    count_tokens: CountTokens = estimate_tokens,
+    header_max_tokens: int = 24,
+    overlap_sentences: int = 0,
+) -> list[tuple[str, int]]:
+    """Pack whole sentences into chunks of at most `max_tokens` tokens.
+
+    Each chunk starts with the page header, cut to `header_max_tokens`, so it
+    is self-contained for both the embedding model and the LLM. Sentences
+    longer than the budget are split between words. Returns (text, tokens)
+    pairs, with tokens counted by `count_tokens` and including the header.
+    """
+    title, title_tokens = "", 0
+    header_pieces = split_words(
+        compact_header(header), min(header_max_tokens, max_tokens // 4), count_tokens
+    )
+    if header_pieces:
+        title, title_tokens = header_pieces[0]
+    budget = max_tokens - title_tokens
+
+    sentences = []
+    for sentence, new_line in split_sentences(content):
+        tokens = count_tokens(sentence)
+        if tokens <= budget:
+            sentences.append((sentence, new_line, tokens))
+        else:
+            for i, (piece, piece_tokens) in enumerate(
+                split_words(sentence, budget, count_tokens)
+            ):
+                sentences.append((piece, new_line and i == 0, piece_tokens))
+
+    def render(group: list[tuple[str, bool, int]]) -> tuple[str, int]:
+        lines = [title] if title else []
+        for i, (sentence, new_line, _) in enumerate(group):
+            if i and not new_line:
+                lines[-1] += " " + sentence
+            else:
+                lines.append(sentence)
+        text = "\n".join(lines)
+        return text, title_tokens + sum(tokens for _, _, tokens in group)
+
+    chunks = []
+    group, tokens = [], 0
+    for sentence in sentences:
+        if group and tokens + sentence[2] > budget:
+            chunks.append(render(group))
+            # Carry the last sentences over only if they leave room for new text
+            group = group[len(group) - overlap_sentences :] if overlap_sentences else []
+            tokens = sum(s[2] for s in group)
+            if tokens + sentence[2] > budget:
+                group, tokens = [], 0
+        group.append(sentence)
+        tokens += sentence[2]
+    if group:
+        chunks.append(render(group))
+    return chunks
+
+
+class ChunkStats:
+    """Token length distribution of the chunks produced for an index."""
+
+    def __init__(self):
+        self.pages = set()
+        self.tokens = []
+
+    def add(self, url: str, tokens: int):
+        self.pages.add(url)
+        self.tokens.append(tokens)
+
+    def summary(self) -> dict:
+        if not self.tokens:
+            return {"pages": 0, "chunks": 0, "tokens": 0}
+        tokens = np.array(self.tokens)
+        return {
+            "pages": len(self.pages),
+            "chunks": len(tokens),
+            "tokens": int(tokens.sum()),
+            "mean_tokens": float(tokens.mean()),
+            "p50_tokens": float(np.percentile(tokens, 50)),
+            "p95_tokens": float(np.percentile(tokens, 95)),
+            "max_tokens": int(tokens.max()),
+        }
+
+    def __str__(self) -> str:
+        summary = self.summary()
+        if not summary["chunks"]:
+            return "no chunks"
+        return (
+            f"{summary['chunks']} chunks from {summary['pages']} pages, "
+            f"{summary['tokens']} tokens (mean {summary['mean_tokens']:.0f}, "
+            f"p50 {summary['p50_tokens']:.0f}, p95 {summary['p95_tokens']:.0f}, "
+            f"max {summary['max_tokens']})"
+        )
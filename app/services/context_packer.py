@@ -0,0 +1,107 @@
+import re
+
+from services.chunking import CountTokens, estimate_tokens, split_words
+
+WORD = re.compile(r"\w+")
+
+
+def shingles(text: str, size: int = 3) -> set[tuple[str, ...]]:
+    words = WORD.findall(text.lower())
+    return {tuple(words[i : i + size]) for i in range(max(len(words) - size + 1, 1))}
+
+
+def similarity(first: set, second: set) -> float:
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+def merge_texts(first: str, second: str, adjacent: bool, min_overlap: int = 20) -> str:
+    """Join two chunks of a page, dropping the text they share.
+
+    Structured chunks repeat the page header as their first line, and
+    consecutive fixed-size windows overlap by a few characters. A gap
+    between chunks that are not consecutive is marked with an ellipsis.
+    """
+    first_line, _, rest = second.partition("\n")
+    if rest and first.partition("\n")[0] == first_line:
+        second = rest
+    elif adjacent:
+        for size in range(min(len(first), len(second)), min_overlap - 1, -1):
+            if first.endswith(second[:size]):
+                return first + second[size:]
+    return f"{first} {second}" if adjacent else f"{first}\n...\n{second}"
+
+
+def fused_score(result) -> float:
+    return result.metadata.get("_fused_score", 0.0)
+
+
+def chunk_index(result) -> int:
+    return result.metadata["_source"].get("chunk_index", 0)
+
+
+def pack_context(
+    search_results: list,
+    max_tokens: int,
+    count_tokens: CountTokens = estimate_tokens,
+    dedup_threshold: float = 0.8,
+) -> tuple[list[dict], int]:
+    """Turn search results into as few prompt tokens as possible.
+
+    Chunks near-identical to a better-scored one are dropped, the rest are
+    merged into one block per page, and blocks are ordered by their best
+    fused search score. Blocks are added until `max_tokens` is reached; the
+    one that crosses it is cut short. Returns the {"url", "text", "score",
+    "tokens"} blocks and how many tokens were saved over sending every
+    chunk as is.
+    """
+    ranked = sorted(search_results, key=fused_score, reverse=True)
+    input_tokens = sum(count_tokens(result.page_content) for result in ranked)
+
+    kept, kept_shingles = [], []
+    for result in ranked:
+        result_shingles = shingles(result.page_content)
+        if any(
+            similarity(result_shingles, other) >= dedup_threshold
+            for other in kept_shingles
+        ):
+            continue
+        kept.append(result)
+        kept_shingles.append(result_shingles)
+
+    pages = {}
+    for result in kept:
+        pages.setdefault(result.metadata["_source"]["url"], []).append(result)
+
+    blocks = []
+    for url, results in pages.items():
+        results.sort(key=chunk_index)
+        text = results[0].page_content
+        for previous, result in zip(results, results[1:]):
+            adjacent = chunk_index(result) == chunk_index(previous) + 1
+            text = merge_texts(text, result.page_content, adjacent)
+        blocks.append(
+            {
+                "url": url,
+                "text": text,
+                "score": max(fused_score(result) for result in results),
+                "tokens": count_tokens(text),
+            }
+        )
+    blocks.sort(key=lambda block: block["score"], reverse=True)
+
+    packed, used = [], 0
+    for block in blocks:
+        remaining = max_tokens - used
+        if block["tokens"] > remaining:
+            # Part of a block is still worth sending, a few words are not
+            if remaining >= 32:
+                text, tokens = split_words(block["text"], remaining, count_tokens)[0]
+                packed.append({**block, "text": text, "tokens": tokens})
+                used += tokens
+            break
+        packed.append(block)
+        used += block["tokens"]
+
+    return packed, max(input_tokens - used, 0)
@@ -0,0 +1,33 @@
+import json
+from typing import Iterator
+
+from utils.logger import logger
+
+
+def iter_corpus(file_path: str) -> Iterator[tuple[str, dict]]:
+    """Yield (url, page) pairs from the crawled corpus.
+
+    `.jsonl` files hold one {"url", "header", "main_content"} object per line
+    and are streamed, so memory stays flat. The crawler only publishes a
+    corpus once the crawl finishes, but a trailing line without a newline is
+    still skipped as an unfinished write, and if a URL appears twice the
+    first record wins. Any other file is read as the legacy {url: page} JSON dict.
+    """
+    if not file_path.endswith(".jsonl"):
+        with open(file_path, "r") as f_in:
+            yield from json.load(f_in).items()
+        return
+
+    seen = set()
+    with open(file_path, "r", encoding="utf-8") as f_in:
+        for line in f_in:
+            if not line.endswith("\n"):
+                logger.info(f"Skipping unfinished last record in {file_path}")
+                break
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            url = record.pop("url")
+            if url not in seen:
+                seen.add(url)
+                yield url, record
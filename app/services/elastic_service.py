@@ -1,133 +1,599 @@
+import asyncio
+import copy
+import hashlib
 import json
+import os
+import random
+from datetime import datetime
+from itertools import islice
+from typing import Awaitable, Callable, Iterable, Iterator
 
 from config import (
+    CHUNK_HEADER_MAX_TOKENS,
+    CHUNK_MAX_TOKENS,
+    CHUNK_OVERLAP_SENTENCES,
+    CHUNKER,
     DATA_FILE_PATH,
     ELASTIC_INDEX_NAME,
     ELASTIC_URL,
+    GROUND_TRUTH_PATH,
+    INDEX_BULK_CHUNK_SIZE,
+    INDEX_BULK_CONCURRENCY,
+    INDEX_EMBED_BATCH_SIZE,
+    INDEX_KEEP_PREVIOUS,
+    INDEX_SMOKE_TEST_MIN_HIT_RATE,
+    INDEX_SMOKE_TEST_SIZE,
+    INDEX_VERSION_CHECK_INTERVAL,
+    LOCAL_INDEX_PATH,
+    SEARCH_BACKEND,
     SENTENCE_TRANSFORMERS_MODEL,
 )
 from elasticsearch import AsyncElasticsearch
-from langchain_elasticsearch import ElasticsearchRetriever
+from elasticsearch.helpers import async_bulk, async_scan
+from langchain_core.documents import Document
 from langchain_huggingface import HuggingFaceEmbeddings
+from services.cache import (
+    embedding_cache,
+    normalize_query,
+    search_cache,
+    set_index_version,
+)
+from services.chunking import (
+    ChunkStats,
+    estimate_tokens,
+    fixed_chunks,
+    structured_chunks,
+)
+from services.corpus import iter_corpus
+from services.embedding_store import EmbeddingStore, text_hash
+from services.local_search import LocalSearchIndex
 from tqdm import tqdm
 from utils.logger import logger
+from utils.metrics import span
+
+# Async callbacks run when the live index version changes, e.g. to drop stale caches
+index_rebuild_listeners: list[Callable[[], Awaitable[None]]] = []
+
+
+async def get_live_index_version() -> str:
+    """Version of the index queries currently hit, as persisted with the index."""
+    if SEARCH_BACKEND == "local":
+        return local_index.corpus_hash
+    # The alias resolves to one concrete index; its name is part of the version
+    # so a recreated alias never reuses an old version number
+    mapping = await es_client.indices.get_mapping(index=ELASTIC_INDEX_NAME)
+    index, body = next(iter(mapping.items()))
+    return f"{index}:{body['mappings'].get('_meta', {}).get('index_version', 0)}"
+
+
+async def refresh_index_version() -> bool:
+    """Pick up the live index version, notifying listeners if it changed."""
+    version = await get_live_index_version()
+    if not set_index_version(version):
+        return False
+    logger.info(f"Live index version is now '{version}'")
+    for listener in index_rebuild_listeners:
+        await listener()
+    return True
+
+
+async def watch_index_version(interval: float = INDEX_VERSION_CHECK_INTERVAL):
+    """Poll the persisted index version so rebuilds made elsewhere reach caches."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await refresh_index_version()
+        except Exception as e:
+            logger.error(f"Failed to check index version: {e}")
+
+
+async def embed_query(query: str) -> list[float]:
+    # Normalised text is only the cache key; the model still sees the original
+    key = normalize_query(query)
+    vector = embedding_cache.get(key)
+    if vector is None:
+        with span("embedding"):
+            vector = await asyncio.to_thread(embeddings.embed_query, query)
+        embedding_cache.put(key, vector)
+    return vector
 
 
 async def search_documents(query: str) -> list:
-    vector = embeddings.embed_query(query)
-
-    knn_results = knn_retriever.invoke(vector)
-    keyword_results = keyword_retriever.invoke(query)
-
-    rrf_scores = {}
-
-    # Calculate RRF using vector search results
-    for rank, hit in enumerate(knn_results):
-        doc_id: str = hit.metadata["_id"]
-        rrf_scores[doc_id] = compute_rrf(rank + 1)
-
-    # Adding keyword search result scores
-    for rank, hit in enumerate(keyword_results):
-        doc_id: str = hit.metadata["_id"]
-        if doc_id in rrf_scores:
-            rrf_scores[doc_id] += compute_rrf(rank + 1)
-        else:
-            rrf_scores[doc_id] = compute_rrf(rank + 1)
+    cache_key = normalize_query(query)
+    top_hits = search_cache.get(cache_key)
+    if top_hits is None:
+        top_hits = await search_top_hits(query, ELASTIC_INDEX_NAME)
+        search_cache.put(cache_key, top_hits)
+
+    # Documents are built from copies so cached hits stay intact
+    return [hit_to_document(copy.deepcopy(hit)) for hit in top_hits]
+
+
+async def search_top_hits(
+    query: str, index_name: str, backend: str = SEARCH_BACKEND
+) -> list[dict]:
+    vector = await embed_query(query)
+    knn_hits, keyword_hits = await retrieve_candidates(
+        query, vector, index_name, backend
+    )
+    with span("fusion"):
+        return await select_top_hits(knn_hits, keyword_hits, index_name)
+
+
+async def retrieve_candidates(
+    query: str, vector: list[float], index_name: str, backend: str = SEARCH_BACKEND
+) -> tuple[list[dict], list[dict]]:
+    if backend == "local":
+        with span("knn"):
+            knn_hits = local_index.knn_search(vector)
+        with span("bm25"):
+            keyword_hits = local_index.keyword_search(query)
+        return knn_hits, keyword_hits
+
+    async def timed_search(stage: str, body: dict) -> list[dict]:
+        with span(stage):
+            results = await es_client.search(index=index_name, **body)
+        return results["hits"]["hits"]
+
+    # kNN and BM25 queries are independent, so send them to ES together
+    return await asyncio.gather(
+        timed_search("knn", knn_query(vector)),
+        timed_search("bm25", keyword_query(query)),
+    )
+
+
+async def select_top_hits(
+    knn_hits: list[dict], keyword_hits: list[dict], index_name: str
+) -> list[dict]:
+    rrf_scores, hits = fuse_results(knn_hits, keyword_hits)
 
     # Sort RRF scores in descending order
     reranked_docs = sorted(rrf_scores.items(), key=lambda x: x[1], reverse=True)
+    top_ids = [doc_id for doc_id, _ in reranked_docs[:10]]
+
+    # Hits already carry their _source; only fetch what is really missing
+    missing_ids = [doc_id for doc_id in top_ids if "_source" not in hits[doc_id]]
+    if missing_ids:
+        response = await es_client.mget(
+            index=index_name, ids=missing_ids, **SOURCE_EXCLUDES
+        )
+        for doc in response["docs"]:
+            if doc.get("found"):
+                hits[doc["_id"]] = doc
 
     # Get top-K documents by the score
     final_results = []
-    for doc_id, score in reranked_docs[:10]:
-        results = id_retriever.invoke(doc_id)
-        if results:
-            final_results.append(results[0])
+    for doc_id in top_ids:
+        hit = hits[doc_id]
+        if "_source" in hit:
+            # Kept for ordering the prompt context, as rerankers may reorder hits
+            hit["_fused_score"] = rrf_scores[doc_id]
+            final_results.append(hit)
         else:
             logger.error(f"Warning: Document with id {doc_id} not found")
 
     return final_results
 
 
+def fuse_results(*result_lists: list[dict]) -> tuple[dict[str, float], dict[str, dict]]:
+    rrf_scores = {}
+    hits = {}
+    for result_hits in result_lists:
+        for rank, hit in enumerate(result_hits):
+            doc_id: str = hit["_id"]
+            rrf_scores[doc_id] = rrf_scores.get(doc_id, 0) + compute_rrf(rank + 1)
+            hits.setdefault(doc_id, hit)
+    return rrf_scores, hits
+
+
+def hit_to_document(hit: dict) -> Document:
+    # Same shape ElasticsearchRetriever produced: content pulled out of _source
+    content = hit["_source"].pop("main_content")
+    return Document(page_content=content, metadata=hit)
+
+
 def get_sentence_embedding_dimension() -> int:
     text = "This is a sample text"
     return len(embeddings.embed_query(text))
 
 
-async def find_or_create_index() -> None:
-    if not await es_client.indices.exists(index=ELASTIC_INDEX_NAME):
-        logger.info(f"Index '{ELASTIC_INDEX_NAME}' does not exist. Creating...")
-        index_settings = {
-            "settings": {"number_of_shards": 1, "number_of_replicas": 0},
-            "mappings": {
-                "properties": {
-                    "url": {"type": "text"},
-                    "header": {"type": "text"},
-                    "main_content": {"type": "text"},
-                    "main_content_vector": {
-                        "type": "dense_vector",
-                        "dims": get_sentence_embedding_dimension(),
-                        "index": True,
-                        "similarity": "cosine",
-                    },
-                }
-            },
-        }
-        await es_client.indices.create(index=ELASTIC_INDEX_NAME, body=index_settings)
-        logger.info(f"Index '{ELASTIC_INDEX_NAME}' created successfully.")
-        raw_doc = await load_data(DATA_FILE_PATH)
-        data_chunk = chunk_data(raw_doc)
-        await encode_and_index_data(data_chunk)
-        logger.info("Data indexed successfully.")
+def index_settings() -> dict:
+    return {
+        "settings": {"number_of_shards": 1, "number_of_replicas": 0},
+        "mappings": {
+            "properties": {
+                "url": {"type": "text"},
+                "header": {"type": "text"},
+                "main_content": {"type": "text"},
+                "chunk_index": {"type": "integer"},
+                "content_hash": {"type": "keyword"},
+                "main_content_vector": {
+                    "type": "dense_vector",
+                    "dims": get_sentence_embedding_dimension(),
+                    "index": True,
+                    "similarity": "cosine",
+                },
+            }
+        },
+    }
+
 
+async def find_or_create_index() -> None:
+    if SEARCH_BACKEND == "local":
+        await load_or_build_local_index()
+        await refresh_index_version()
+        return
+
+    # ELASTIC_INDEX_NAME is an alias pointing at the live versioned index
+    if await es_client.indices.exists_alias(name=ELASTIC_INDEX_NAME):
+        logger.info(f"Index alias '{ELASTIC_INDEX_NAME}' already exists.")
+        await sync_index(ELASTIC_INDEX_NAME)
     else:
-        logger.info(f"Index '{ELASTIC_INDEX_NAME}' already exists.")
-
-
-async def load_data(file_path: str) -> dict:
-    with open(file_path, "r") as f_in:
-        return json.load(f_in)
-
-
-def chunk_data(raw_doc: dict, chunk_size: int = 1000, overlap: int = 100) -> list[dict]:
-    def chunk_content(
-        content: str, chunk_size: int = 1000, overlap: int = 100
-    ) -> list[str]:
-        chunks = []
-        start = 0
-        while start < len(content):
-            end = start + chunk_size
-            chunk = content[start:end]
-            chunks.append(chunk)
-            start = end - overlap
-        return chunks
-
-    chunked_data = []
-    for k, v in raw_doc.items():
-        content_chunks = chunk_content(v["main_content"], chunk_size, overlap)
-        for i, chunk in enumerate(content_chunks):
-            chunked_data.append(
-                {
-                    "url": k,
-                    "header": v["header"],
-                    "main_content": chunk,
-                    "chunk_index": i,
-                }
+        logger.info(f"Index alias '{ELASTIC_INDEX_NAME}' does not exist. Creating...")
+        if not await rebuild_index():
+            raise RuntimeError(f"Failed to build index for '{ELASTIC_INDEX_NAME}'")
+    await refresh_index_version()
+
+
+async def load_or_build_local_index(path: str = LOCAL_INDEX_PATH):
+    """Load the persisted local index, rebuilding it if the data file changed.
+
+    Callers serving queries publish the new version with refresh_index_version;
+    the benchmark builds the index without touching the configured backend.
+    """
+    stats = ChunkStats()
+    data_chunk = list(chunk_data(iter_corpus(DATA_FILE_PATH), stats=stats))
+    corpus_hash = hashlib.sha256(
+        "".join(chunk_id(doc) + doc["content_hash"] for doc in data_chunk).encode()
+    ).hexdigest()
+
+    if local_index.load(path) and local_index.corpus_hash == corpus_hash:
+        return
+
+    logger.info(f"Building local search index from {stats}")
+    vectors = []
+    for start in range(0, len(data_chunk), INDEX_EMBED_BATCH_SIZE):
+        batch = data_chunk[start : start + INDEX_EMBED_BATCH_SIZE]
+        vectors.extend(await embed_documents([doc["main_content"] for doc in batch]))
+    embedding_store.save()
+
+    local_index.fit(
+        [chunk_id(doc) for doc in data_chunk], data_chunk, vectors, corpus_hash
+    )
+    local_index.save(path)
+
+
+async def rebuild_index() -> bool:
+    """Build a fresh index next to the live one and swap the alias to it.
+
+    Queries keep hitting the current index until the new one is fully
+    indexed and passes the ground-truth smoke test. Returns False, leaving
+    the live index untouched, if validation fails while a live index exists.
+    """
+    new_index = f"{ELASTIC_INDEX_NAME}-{datetime.utcnow():%Y%m%d%H%M%S}"
+    live_indices = await get_alias_indices()
+    previous_version = (
+        await get_index_version(ELASTIC_INDEX_NAME) if live_indices else 0
+    )
+
+    logger.info(f"Building index '{new_index}'")
+    await es_client.indices.create(index=new_index, body=index_settings())
+    # Chunks stream from the corpus file straight into the bulk indexer
+    stats = ChunkStats()
+    errors = await encode_and_index_data(
+        chunk_data(iter_corpus(DATA_FILE_PATH), stats=stats), index_name=new_index
+    )
+    logger.info(f"Indexed {stats} into '{new_index}'")
+
+    if errors or not await validate_index(new_index):
+        if live_indices:
+            logger.error(f"Index '{new_index}' failed validation, keeping live index")
+            await es_client.indices.delete(index=new_index)
+            return False
+        # Nothing to fall back to, so a degraded index beats no index
+        logger.error(f"Index '{new_index}' failed validation, using it anyway")
+
+    await record_index_version(new_index, previous_version)
+    await swap_alias(new_index, live_indices)
+    logger.info(f"Alias '{ELASTIC_INDEX_NAME}' now points to '{new_index}'")
+    await refresh_index_version()
+    await garbage_collect_indices()
+    return True
+
+
+async def validate_index(
+    index_name: str,
+    sample_size: int = INDEX_SMOKE_TEST_SIZE,
+    min_hit_rate: float = INDEX_SMOKE_TEST_MIN_HIT_RATE,
+) -> bool:
+    count = (await es_client.count(index=index_name))["count"]
+    if count == 0:
+        logger.error(f"Index '{index_name}' is empty")
+        return False
+
+    if not os.path.exists(GROUND_TRUTH_PATH):
+        logger.info(f"No ground truth at {GROUND_TRUTH_PATH}, skipping smoke test")
+        return True
+
+    with open(GROUND_TRUTH_PATH, "r") as f_in:
+        ground_truth = json.load(f_in)
+    sample = random.Random(42).sample(ground_truth, min(sample_size, len(ground_truth)))
+
+    hits = 0
+    for item in sample:
+        top_hits = await search_top_hits(item["question"], index_name)
+        if any(hit["_source"]["url"] == item["url"] for hit in top_hits):
+            hits += 1
+    hit_rate = hits / len(sample) if sample else 1.0
+    logger.info(f"Smoke test for '{index_name}': hit rate {hit_rate:.2f}")
+    return hit_rate >= min_hit_rate
+
+
+async def get_alias_indices() -> list[str]:
+    if not await es_client.indices.exists_alias(name=ELASTIC_INDEX_NAME):
+        return []
+    aliases = await es_client.indices.get_alias(name=ELASTIC_INDEX_NAME)
+    return list(aliases.keys())
+
+
+async def swap_alias(new_index: str, live_indices: list[str]):
+    actions = [
+        {"remove": {"index": index, "alias": ELASTIC_INDEX_NAME}}
+        for index in live_indices
+    ]
+    # An index created before aliases were used occupies the alias name
+    if not live_indices and await es_client.indices.exists(index=ELASTIC_INDEX_NAME):
+        actions.append({"remove_index": {"index": ELASTIC_INDEX_NAME}})
+    actions.append({"add": {"index": new_index, "alias": ELASTIC_INDEX_NAME}})
+    await es_client.indices.update_aliases(actions=actions)
+
+
+async def garbage_collect_indices(keep: int = INDEX_KEEP_PREVIOUS):
+    """Delete versioned indices no longer behind the alias, keeping `keep` newest."""
+    live_indices = set(await get_alias_indices())
+    indices = await es_client.indices.get(index=f"{ELASTIC_INDEX_NAME}-*")
+    # Names end with a sortable timestamp
+    stale = sorted(index for index in indices if index not in live_indices)
+    for index in stale[: max(len(stale) - keep, 0)]:
+        logger.info(f"Deleting old index '{index}'")
+        await es_client.indices.delete(index=index)
+
+
+async def sync_index(index_name: str) -> bool:
+    """Bring an existing index in line with the data file.
+
+    Only chunks whose content hash is new or changed are embedded, and chunks
+    that no longer exist are deleted. Returns True if anything changed.
+    """
+    indexed_hashes = await get_indexed_hashes(index_name)
+    current_ids = set()
+    changed = 0
+    stats = ChunkStats()
+
+    def changed_chunks() -> Iterator[dict]:
+        nonlocal changed
+        for doc in chunk_data(iter_corpus(DATA_FILE_PATH), stats=stats):
+            current_ids.add(chunk_id(doc))
+            if indexed_hashes.get(chunk_id(doc)) != doc["content_hash"]:
+                changed += 1
+                yield doc
+
+    await encode_and_index_data(changed_chunks(), index_name=index_name)
+    removed = [doc_id for doc_id in indexed_hashes if doc_id not in current_ids]
+    logger.info(f"Corpus for '{index_name}': {stats}")
+
+    if not changed and not removed:
+        logger.info(f"Index '{index_name}' is up to date.")
+        return False
+
+    logger.info(
+        f"Synced index '{index_name}': {changed} new or changed chunks, {len(removed)} removed"
+    )
+    await delete_documents(removed, index_name)
+    await record_index_version(index_name)
+    await refresh_index_version()
+    return True
+
+
+async def get_indexed_hashes(index_name: str) -> dict[str, str | None]:
+    hashes = {}
+    async for hit in async_scan(
+        es_client,
+        index=index_name,
+        query={"query": {"match_all": {}}, "_source": ["content_hash"]},
+    ):
+        hashes[hit["_id"]] = hit["_source"].get("content_hash")
+    return hashes
+
+
+async def delete_documents(doc_ids: list[str], index_name: str):
+    if not doc_ids:
+        return
+    actions = [{"_op_type": "delete", "_index": index_name, "_id": i} for i in doc_ids]
+    _, errors = await async_bulk(
+        es_client, actions, raise_on_error=False, raise_on_exception=False
+    )
+    if errors:
+        logger.error(f"Failed to delete {len(errors)} documents from '{index_name}'")
+    await es_client.indices.refresh(index=index_name)
+
+
+async def get_index_version(index_name: str) -> int:
+    mapping = await es_client.indices.get_mapping(index=index_name)
+    meta = next(iter(mapping.values()))["mappings"].get("_meta", {})
+    return meta.get("index_version", 0)
+
+
+async def record_index_version(
+    index_name: str, previous_version: int | None = None
+) -> int:
+    if previous_version is None:
+        previous_version = await get_index_version(index_name)
+    version = previous_version + 1
+    await es_client.indices.put_mapping(
+        index=index_name,
+        meta={"index_version": version, "updated_at": datetime.utcnow().isoformat()},
+    )
+    logger.info(f"Index '{index_name}' is now at version {version}")
+    return version
+
+
+def count_tokens(text: str) -> int:
+    """Tokens the embedding model splits `text` into, without special tokens."""
+    tokenizer = getattr(getattr(embeddings, "client", None), "tokenizer", None)
+    if tokenizer is None:
+        return estimate_tokens(text)
+    return len(tokenizer.tokenize(text))
+
+
+def chunk_token_limit() -> int:
+    if CHUNK_MAX_TOKENS:
+        return CHUNK_MAX_TOKENS
+    # Longer texts are truncated by the model, so their tail is never embedded
+    max_seq_length = getattr(getattr(embeddings, "client", None), "max_seq_length", 0)
+    return (max_seq_length or 128) - 2  # room for [CLS] and [SEP]
+
+
+def chunk_data(
+    pages: Iterable[tuple[str, dict]],
+    chunker: str = CHUNKER,
+    stats: ChunkStats | None = None,
+) -> Iterator[dict]:
+    """Split pages into chunks with the configured chunker.
+
+    "structured" packs whole sentences into chunks of `chunk_token_limit()`
+    tokens, each starting with the page header. "fixed" is the previous
+    1000-character window with a 100-character overlap. Token counts are
+    added to `stats` if given.
+    """
+    max_tokens = chunk_token_limit()
+    for url, page in pages:
+        if chunker == "fixed":
+            chunks = [(chunk, None) for chunk in fixed_chunks(page["main_content"])]
+        else:
+            chunks = structured_chunks(
+                page["header"],
+                page["main_content"],
+                max_tokens,
+                count_tokens,
+                CHUNK_HEADER_MAX_TOKENS,
+                CHUNK_OVERLAP_SENTENCES,
             )
-
-    return chunked_data
+        for i, (chunk, tokens) in enumerate(chunks):
+            if stats is not None:
+                stats.add(url, count_tokens(chunk) if tokens is None else tokens)
+            yield {
+                "url": url,
+                "header": page["header"],
+                "main_content": chunk,
+                "chunk_index": i,
+                "content_hash": content_hash(page["header"], chunk),
+            }
 
 
-async def encode_and_index_data(data_chunk: list[dict]):
-    for doc in tqdm(data_chunk, desc="Indexing documents"):
-        doc["main_content_vector"] = embeddings.embed_query(doc["main_content"])
-        await es_client.index(index=ELASTIC_INDEX_NAME, document=doc)
+def chunk_id(doc: dict) -> str:
+    return f"{doc['url']}#{doc['chunk_index']}"
+
+
+def content_hash(header: str, content: str) -> str:
+    return hashlib.sha256(f"{header}\0{content}".encode("utf-8")).hexdigest()
+
+
+async def embed_documents(texts: list[str]) -> list[list[float]]:
+    """Embed texts, reusing vectors from the embedding store where possible."""
+    hashes = [text_hash(text) for text in texts]
+    stored = embedding_store.get_many(hashes)
+    missing = [(key, text) for key, text in zip(hashes, texts) if key not in stored]
+    if missing:
+        vectors = await asyncio.to_thread(
+            embeddings.embed_documents, [text for _, text in missing]
+        )
+        embedding_store.put_many([key for key, _ in missing], vectors)
+        stored.update(zip([key for key, _ in missing], vectors))
+    return [stored[key] for key in hashes]
+
+
+async def encode_and_index_data(
+    data_chunk: Iterable[dict],
+    index_name: str = ELASTIC_INDEX_NAME,
+    batch_size: int = INDEX_EMBED_BATCH_SIZE,
+    bulk_chunk_size: int = INDEX_BULK_CHUNK_SIZE,
+    concurrency: int = INDEX_BULK_CONCURRENCY,
+) -> list[dict]:
+    """Embed chunks in batches and push them to Elasticsearch via the bulk API.
+
+    `data_chunk` may be a generator; it is consumed one embedding batch at a
+    time. Embedding runs in a worker thread so the event loop stays
+    responsive. Embedded documents are buffered until `bulk_chunk_size` of
+    them are ready and then sent as one bulk request, with at most
+    `concurrency` requests queued or in flight so memory stays bounded.
+    Returns the list of per-document errors from all requests.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    errors = []
+    pending = set()
+    buffer = []
+
+    async def index_batch(batch: list[dict]):
+        async with semaphore:
+            actions = [
+                {"_index": index_name, "_id": chunk_id(doc), "_source": doc}
+                for doc in batch
+            ]
+            try:
+                _, batch_errors = await async_bulk(
+                    es_client,
+                    actions,
+                    chunk_size=bulk_chunk_size,
+                    raise_on_error=False,
+                    raise_on_exception=False,
+                )
+                errors.extend(batch_errors)
+            except Exception as e:
+                logger.error(f"Bulk indexing of {len(batch)} documents failed: {e}")
+                errors.append({"error": str(e), "count": len(batch)})
+            progress.update(len(batch))
+
+    def flush():
+        # Keep embedding the next batches while earlier bulk requests run
+        task = asyncio.create_task(index_batch(buffer[:]))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+        buffer.clear()
+
+    chunks = iter(data_chunk)
+    with tqdm(desc="Indexing documents", unit="docs") as progress:
+        while batch := list(islice(chunks, batch_size)):
+            vectors = await embed_documents([doc["main_content"] for doc in batch])
+            for doc, vector in zip(batch, vectors):
+                doc["main_content_vector"] = vector
+
+            buffer.extend(batch)
+            if len(buffer) >= bulk_chunk_size:
+                if len(pending) >= concurrency:
+                    await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                flush()
+
+        if buffer:
+            flush()
+        await asyncio.gather(*pending)
+
+    embedding_store.save()
+
+    await es_client.indices.refresh(index=index_name)
+    if errors:
+        logger.error(f"Indexing finished with {len(errors)} errors")
+    return errors
 
 
 async def close_es_client():
     await es_client.close()
 
 
+# Vectors are never read back, so keep them out of search responses
+SOURCE_EXCLUDES = {"source_excludes": ["main_content_vector"]}
+
+
 def compute_rrf(rank: int, k=60) -> float:
     return 1 / (k + rank)
 
@@ -141,6 +607,7 @@ def knn_query(vector_query: list[float]) -> dict:
             "num_candidates": 10000,
         },
         "size": 20,
+        **SOURCE_EXCLUDES,
     }
 
 
@@ -158,38 +625,17 @@ def keyword_query(query: str) -> dict:
             }
         },
         "size": 20,
+        **SOURCE_EXCLUDES,
     }
 
 
-def id_query(doc_id: str) -> dict:
-    return {"query": {"ids": {"values": [doc_id]}}}
-
-
 es_client = AsyncElasticsearch([ELASTIC_URL])
 embeddings = HuggingFaceEmbeddings(
     model_name=f"sentence-transformers/{SENTENCE_TRANSFORMERS_MODEL}"
 )
 
-knn_retriever = ElasticsearchRetriever.from_es_params(
-    index_name=ELASTIC_INDEX_NAME,
-    body_func=knn_query,
-    content_field="main_content",
-    url=ELASTIC_URL,
-)
-
-keyword_retriever = ElasticsearchRetriever.from_es_params(
-    index_name=ELASTIC_INDEX_NAME,
-    body_func=keyword_query,
-    content_field="main_content",
-    url=ELASTIC_URL,
-)
-
-id_retriever = ElasticsearchRetriever.from_es_params(
-    index_name=ELASTIC_INDEX_NAME,
-    body_func=id_query,
-    content_field="main_content",
-    url=ELASTIC_URL,
-)
+embedding_store = EmbeddingStore(SENTENCE_TRANSFORMERS_MODEL)
+local_index = LocalSearchIndex()
 
 logger.info(f"Initialized Elasticsearch client with URL: {ELASTIC_URL}")
 logger.info(f"Loaded HuggingFaceEmbeddings model: {SENTENCE_TRANSFORMERS_MODEL}")
@@ -0,0 +1,90 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+from config import EMBEDDING_STORE_DTYPE, EMBEDDING_STORE_PATH
+from utils.logger import logger
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """On-disk store of chunk embeddings keyed by (model name, text hash).
+
+    Vectors live in a memory-mapped .npy array per model, with a small JSON
+    index mapping each text hash to its row. New vectors are buffered in
+    memory until `save` rewrites the array atomically.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        path: str = EMBEDDING_STORE_PATH,
+        dtype: str = EMBEDDING_STORE_DTYPE,
+    ):
+        self.directory = os.path.join(path, model_name.replace("/", "__"))
+        self.vectors_path = os.path.join(self.directory, "vectors.npy")
+        self.ids_path = os.path.join(self.directory, "ids.json")
+        self.dtype = np.dtype(dtype)
+        self.rows: dict[str, int] = {}
+        self.vectors: np.ndarray | None = None
+        self.pending: dict[str, np.ndarray] = {}
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self.rows) + len(self.pending)
+
+    def get_many(self, hashes: list[str]) -> dict[str, list[float]]:
+        found = {}
+        for key in hashes:
+            if key in self.pending:
+                found[key] = self.pending[key].astype(np.float32).tolist()
+            elif key in self.rows:
+                found[key] = self.vectors[self.rows[key]].astype(np.float32).tolist()
+        return found
+
+    def put_many(self, hashes: list[str], vectors: list[list[float]]):
+        for key, vector in zip(hashes, vectors):
+            if key not in self.rows:
+                self.pending[key] = np.asarray(vector, dtype=self.dtype)
+
+    def save(self):
+        if not self.pending:
+            return
+        new_vectors = np.stack(list(self.pending.values()))
+        if self.vectors is not None and len(self.vectors):
+            new_vectors = np.concatenate([np.asarray(self.vectors), new_vectors])
+        rows = dict(self.rows)
+        for key in self.pending:
+            rows[key] = len(rows)
+
+        os.makedirs(self.directory, exist_ok=True)
+        # Write both files next to the originals, then swap them in
+        np.save(self.vectors_path + ".tmp.npy", new_vectors)
+        with open(self.ids_path + ".tmp", "w") as f_out:
+            json.dump(rows, f_out)
+        self.vectors = None
+        os.replace(self.vectors_path + ".tmp.npy", self.vectors_path)
+        os.replace(self.ids_path + ".tmp", self.ids_path)
+
+        logger.info(f"Saved {len(self.pending)} new embeddings to {self.directory}")
+        self.pending.clear()
+        self._load()
+
+    def _load(self):
+        if not (os.path.exists(self.vectors_path) and os.path.exists(self.ids_path)):
+            return
+        with open(self.ids_path, "r") as f_in:
+            rows = json.load(f_in)
+        vectors = np.load(self.vectors_path, mmap_mode="r")
+        if len(rows) != len(vectors):
+            logger.error(
+                f"Embedding store at {self.directory} is inconsistent, ignoring"
+            )
+            return
+        self.rows = rows
+        self.vectors = vectors
+        logger.info(f"Loaded {len(rows)} stored embeddings from {self.directory}")
@@ -0,0 +1,262 @@
+from config import LANGUAGE_DETECTION_THRESHOLD
+from py3langid.langid import MODEL_FILE, LanguageIdentifier
+from utils.logger import logger
+
+# ISO 639-1 code -> English name, as used in translation prompts
+LANGUAGE_NAMES = {
+    "aa": "afar",
+    "ab": "abkhazian",
+    "ae": "avestan",
+    "af": "afrikaans",
+    "ak": "akan",
+    "am": "amharic",
+    "an": "aragonese",
+    "ar": "arabic",
+    "as": "assamese",
+    "av": "avaric",
+    "ay": "aymara",
+    "az": "azerbaijani",
+    "ba": "bashkir",
+    "be": "belarusian",
+    "bg": "bulgarian",
+    "bi": "bislama",
+    "bm": "bambara",
+    "bn": "bengali",
+    "bo": "tibetan",
+    "br": "breton",
+    "bs": "bosnian",
+    "ca": "catalan",
+    "ce": "chechen",
+    "ch": "chamorro",
+    "co": "corsican",
+    "cr": "cree",
+    "cs": "czech",
+    "cu": "church slavic",
+    "cv": "chuvash",
+    "cy": "welsh",
+    "da": "danish",
+    "de": "german",
+    "dv": "dhivehi",
+    "dz": "dzongkha",
+    "ee": "ewe",
+    "el": "greek",
+    "en": "english",
+    "eo": "esperanto",
+    "es": "spanish",
+    "et": "estonian",
+    "eu": "basque",
+    "fa": "persian",
+    "ff": "fulah",
+    "fi": "finnish",
+    "fj": "fijian",
+    "fo": "faroese",
+    "fr": "french",
+    "fy": "western frisian",
+    "ga": "irish",
+    "gd": "scottish gaelic",
+    "gl": "galician",
+    "gn": "guarani",
+    "gu": "gujarati",
+    "gv": "manx",
+    "ha": "hausa",
+    "he": "hebrew",
+    "hi": "hindi",
+    "ho": "hiri motu",
+    "hr": "croatian",
+    "ht": "haitian creole",
+    "hu": "hungarian",
+    "hy": "armenian",
+    "hz": "herero",
+    "ia": "interlingua",
+    "id": "indonesian",
+    "ie": "interlingue",
+    "ig": "igbo",
+    "ii": "sichuan yi",
+    "ik": "inupiaq",
+    "io": "ido",
+    "is": "icelandic",
+    "it": "italian",
+    "iu": "inuktitut",
+    "ja": "japanese",
+    "jv": "javanese",
+    "ka": "georgian",
+    "kg": "kongo",
+    "ki": "kikuyu",
+    "kj": "kuanyama",
+    "kk": "kazakh",
+    "kl": "kalaallisut",
+    "km": "khmer",
+    "kn": "kannada",
+    "ko": "korean",
+    "kr": "kanuri",
+    "ks": "kashmiri",
+    "ku": "kurdish",
+    "kv": "komi",
+    "kw": "cornish",
+    "ky": "kyrgyz",
+    "la": "latin",
+    "lb": "luxembourgish",
+    "lg": "ganda",
+    "li": "limburgish",
+    "ln": "lingala",
+    "lo": "lao",
+    "lt": "lithuanian",
+    "lu": "luba-katanga",
+    "lv": "latvian",
+    "mg": "malagasy",
+    "mh": "marshallese",
+    "mi": "maori",
+    "mk": "macedonian",
+    "ml": "malayalam",
+    "mn": "mongolian",
+    "mr": "marathi",
+    "ms": "malay",
+    "mt": "maltese",
+    "my": "burmese",
+    "na": "nauru",
+    "nb": "norwegian bokmal",
+    "nd": "north ndebele",
+    "ne": "nepali",
+    "ng": "ndonga",
+    "nl": "dutch",
+    "nn": "norwegian nynorsk",
+    "no": "norwegian",
+    "nr": "south ndebele",
+    "nv": "navajo",
+    "ny": "chichewa",
+    "oc": "occitan",
+    "oj": "ojibwa",
+    "om": "oromo",
+    "or": "odia",
+    "os": "ossetian",
+    "pa": "punjabi",
+    "pi": "pali",
+    "pl": "polish",
+    "ps": "pashto",
+    "pt": "portuguese",
+    "qu": "quechua",
+    "rm": "romansh",
+    "rn": "kirundi",
+    "ro": "romanian",
+    "ru": "russian",
+    "rw": "kinyarwanda",
+    "sa": "sanskrit",
+    "sc": "sardinian",
+    "sd": "sindhi",
+    "se": "northern sami",
+    "sg": "sango",
+    "si": "sinhala",
+    "sk": "slovak",
+    "sl": "slovenian",
+    "sm": "samoan",
+    "sn": "shona",
+    "so": "somali",
+    "sq": "albanian",
+    "sr": "serbian",
+    "ss": "swati",
+    "st": "southern sotho",
+    "su": "sundanese",
+    "sv": "swedish",
+    "sw": "swahili",
+    "ta": "tamil",
+    "te": "telugu",
+    "tg": "tajik",
+    "th": "thai",
+    "ti": "tigrinya",
+    "tk": "turkmen",
+    "tl": "tagalog",
+    "tn": "tswana",
+    "to": "tongan",
+    "tr": "turkish",
+    "ts": "tsonga",
+    "tt": "tatar",
+    "tw": "twi",
+    "ty": "tahitian",
+    "ug": "uyghur",
+    "uk": "ukrainian",
+    "ur": "urdu",
+    "uz": "uzbek",
+    "ve": "venda",
+    "vi": "vietnamese",
+    "vo": "volapuk",
+    "wa": "walloon",
+    "wo": "wolof",
+    "xh": "xhosa",
+    "yi": "yiddish",
+    "yo": "yoruba",
+    "za": "zhuang",
+    "zh": "chinese",
+    "zu": "zulu",
+}
+LANGUAGE_CODES = {name: code for code, name in LANGUAGE_NAMES.items()}
+# Other names the LLM commonly uses for the same languages
+LANGUAGE_CODES.update(
+    {
+        "bokmal": "nb",
+        "bokmål": "nb",
+        "burmese": "my",
+        "cantonese": "zh",
+        "castilian": "es",
+        "divehi": "dv",
+        "farsi": "fa",
+        "filipino": "tl",
+        "flemish": "nl",
+        "frisian": "fy",
+        "gaelic": "gd",
+        "haitian": "ht",
+        "kirghiz": "ky",
+        "mandarin": "zh",
+        "māori": "mi",
+        "moldovan": "ro",
+        "norwegian bokmål": "nb",
+        "nynorsk": "nn",
+        "oriya": "or",
+        "panjabi": "pa",
+        "pushto": "ps",
+        "sesotho": "st",
+        "sinhalese": "si",
+        "uighur": "ug",
+        "valencian": "ca",
+    }
+)
+
+identifier = LanguageIdentifier.from_model_file(MODEL_FILE, norm_probs=True)
+
+
+def detect_language(text: str) -> tuple[str, float]:
+    code, confidence = identifier.classify(text)
+    return code, float(confidence)
+
+
+def confident_language(text: str) -> str | None:
+    """ISO 639-1 code of the text if local detection is confident, else None."""
+    code, confidence = detect_language(text)
+    logger.info(f"Local language detection: {code} ({confidence:.2f})")
+    if confidence >= LANGUAGE_DETECTION_THRESHOLD and code in LANGUAGE_NAMES:
+        return code
+    return None
+
+
+def normalize_language(language: str, fallback: str = "en") -> str:
+    """Map a language name or code as returned by the LLM to an ISO 639-1 code.
+
+    Names that are not in the table map to `fallback`, so callers always get
+    a code `language_name` can turn back into a name.
+    """
+    language = language.strip().lower()
+    if language in LANGUAGE_NAMES:
+        return language
+    # "en-US", "pt_BR" and similar region-qualified codes
+    base = language.replace("_", "-").split("-")[0]
+    if base in LANGUAGE_NAMES:
+        return base
+    # "English (US)" and similar descriptive names
+    name = language.split("(")[0].strip()
+    if name in LANGUAGE_CODES:
+        return LANGUAGE_CODES[name]
+    logger.error(f"Unknown language '{language}', falling back to '{fallback}'")
+    return fallback
+
+
+def language_name(code: str) -> str:
+    return LANGUAGE_NAMES.get(code, code)
@@ -1,13 +1,40 @@
+import asyncio
+import json
 import re
+from typing import Awaitable, Callable
 
 from anthropic import Anthropic
-from config import ANTHROPIC_API_KEY, LLM_MODEL
+from config import (
+    ANTHROPIC_API_KEY,
+    CONTEXT_DEDUP_THRESHOLD,
+    CONTEXT_MAX_TOKENS,
+    LLM_MODEL,
+    QUERY_UNDERSTANDING,
+    RELEVANCE_CONCURRENCY,
+    RELEVANCE_MAX_RESULTS,
+    RELEVANCE_MODE,
+    RELEVANCE_TIMEOUT,
+    RELEVANCE_TIMEOUT_VERDICT,
+    RERANKER,
+)
 from langchain.prompts import PromptTemplate
-from langchain.schema import HumanMessage
+from langchain.schema import HumanMessage, SystemMessage
 from langchain_anthropic import AnthropicLLM, ChatAnthropic
 from langchain_community.callbacks.manager import get_openai_callback
-from services.elastic_service import search_documents
+from services.answer_cache import answer_cache
+from services.cache import normalize_query, relevance_cache
+from services.context_packer import pack_context
+from services.elastic_service import count_tokens, search_documents
+from services.language import (
+    LANGUAGE_NAMES,
+    confident_language,
+    detect_language,
+    language_name,
+    normalize_language,
+)
+from services.reranker import cross_encoder_rerank
 from utils.logger import logger
+from utils.metrics import span
 
 client = Anthropic(api_key=ANTHROPIC_API_KEY)
 llm = AnthropicLLM(model=LLM_MODEL, anthropic_api_key=ANTHROPIC_API_KEY)
@@ -16,11 +43,20 @@ chat_model = ChatAnthropic(model=LLM_MODEL, anthropic_api_key=ANTHROPIC_API_KEY)
 logger.info(f"Initialized Anthropic client and models with model: {LLM_MODEL}")
 
 
+# Timed-out relevance checks left to finish; referenced so they are not collected
+background_tasks: set[asyncio.Task] = set()
+
+
 class TokenCounter:
     def __init__(self):
         self.main_prompt_tokens = 0
         self.output_tokens = 0
         self.system_tokens = 0
+        self.cache_read_tokens = 0
+        self.cache_write_tokens = 0
+        self.context_tokens_saved = 0
+        # LLM calls still running after their caller stopped waiting for them
+        self.pending: set[asyncio.Task] = set()
 
     def add_main_prompt_tokens(self, tokens: int):
         self.main_prompt_tokens += tokens
@@ -31,60 +67,208 @@ class TokenCounter:
     def add_system_tokens(self, tokens: int):
         self.system_tokens += tokens
 
+    def add_cache_read_tokens(self, tokens: int):
+        self.cache_read_tokens += tokens
+
+    def add_cache_write_tokens(self, tokens: int):
+        self.cache_write_tokens += tokens
+
+    def add_context_tokens_saved(self, tokens: int):
+        self.context_tokens_saved += tokens
+
+    def track(self, task: asyncio.Task):
+        """Keep a call whose usage will be recorded after the answer is sent."""
+        for tasks in (self.pending, background_tasks):
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+    async def wait_pending(self):
+        await asyncio.gather(*self.pending, return_exceptions=True)
+
+    def record_usage(self, response, main: bool = False):
+        """Add a chat response's usage metadata, including prompt cache tokens."""
+        usage = response.usage_metadata or {}
+        details = usage.get("input_token_details") or {}
+        self.add_cache_read_tokens(details.get("cache_read") or 0)
+        self.add_cache_write_tokens(details.get("cache_creation") or 0)
+        if main:
+            self.add_main_prompt_tokens(usage.get("input_tokens", 0))
+            self.add_output_tokens(usage.get("output_tokens", 0))
+        else:
+            self.add_system_tokens(usage.get("total_tokens", 0))
+
+
+def cached_system_message(text: str) -> SystemMessage:
+    # Static instructions go in a system block marked for Anthropic prompt caching
+    return SystemMessage(
+        content=[{"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}]
+    )
+
 
-async def process_query(query: str) -> tuple[str, str, TokenCounter]:
+async def process_query(
+    query: str, on_partial: Callable[[str], Awaitable[None]] | None = None
+) -> tuple[str, str, TokenCounter]:
     logger.info(f"Processing query: {query}")
 
     token_counter = TokenCounter()
 
-    # Detect language and translate if necessary
-    detected_language, translated_query = await detect_and_translate(
-        query, token_counter
-    )
+    # Most traffic is English; a confident local detection skips translation,
+    # and for other languages it is trusted over the LLM's free-text name
+    with span("detection"):
+        local_language = confident_language(query)
+    is_english = local_language == "en"
+
+    understanding = None
+    if QUERY_UNDERSTANDING == "single":
+        with span("understanding"):
+            understanding = await understand_query(query, token_counter)
+
+    if understanding:
+        detected_language, translated_query, is_related, search_query = understanding
+    else:
+        if is_english:
+            detected_language, translated_query = "en", query
+        else:
+            # Detect language and translate if necessary
+            with span("detection"):
+                detected_language, translated_query = await detect_and_translate(
+                    query, token_counter
+                )
+        # Check if the query is related to NZ immigration
+        with span("relevance_gate"):
+            is_related = await is_related_to_nz_immigration(
+                translated_query, token_counter
+            )
+        search_query = None
+
+    if local_language:
+        detected_language = local_language
+    else:
+        # An unrecognised name falls back to the best local guess
+        fallback, _ = detect_language(query)
+        detected_language = normalize_language(
+            detected_language, fallback if fallback in LANGUAGE_NAMES else "en"
+        )
+    if is_english:
+        translated_query = query
     logger.info(f"Detected language: {detected_language}")
 
-    # Check if the query is related to NZ immigration
-    if not await is_related_to_nz_immigration(translated_query, token_counter):
+    if not is_related:
         logger.info("Query not related to NZ immigration. Generating generic response.")
         answer = await generate_generic_response(translated_query, token_counter)
-        if detected_language not in ["english", "en"]:
-            logger.info(f"Translating answer back to {detected_language}")
-            answer = await translate_text(
-                answer, "english", detected_language, token_counter
-            )
+        answer = await localize_answer(answer, detected_language, token_counter)
 
         return answer, detected_language, token_counter
 
+    if answer_cache:
+        with span("answer_cache"):
+            cached_answer = await answer_cache.get(translated_query)
+        if cached_answer:
+            logger.info("Answered from cache")
+            answer = await localize_answer(
+                cached_answer, detected_language, token_counter
+            )
+            return answer, detected_language, token_counter
+
     # Prepare relevant search query
-    search_query = await prepare_search_query(translated_query, token_counter)
+    if not search_query:
+        with span("query_rewrite"):
+            search_query = await prepare_search_query(translated_query, token_counter)
     logger.info(f"Prepared search query: {search_query}")
 
     search_results = await search_documents(search_query)
     logger.info(f"Found {len(search_results)} search results")
 
     # Filter relevant search results
-    relevant_results = await filter_relevant_results(
-        translated_query, search_results, token_counter
-    )
+    with span("relevance_filtering"):
+        relevant_results = await rerank_results(
+            translated_query, search_results, token_counter
+        )
     logger.info(f"Filtered to {len(relevant_results)} relevant results")
 
-    prompt = build_prompt(translated_query, relevant_results)
-    response = await call_llm(prompt, token_counter)
+    prompt = build_prompt(translated_query, relevant_results, token_counter)
+    # A translated answer only exists once generation is done, so only
+    # English answers are streamed to the user
+    with span("generation"):
+        if on_partial and detected_language == "en":
+            response = await stream_llm(prompt, token_counter, on_partial)
+        else:
+            response = await call_llm(prompt, token_counter)
     answer = extract_answer(response)
 
+    if answer_cache:
+        await answer_cache.put(translated_query, answer)
+
     # Translate answer back to original language if necessary
-    if detected_language not in ["english", "en"]:
-        logger.info(f"Translating answer back to {detected_language}")
-        answer = await translate_text(
-            answer, "english", detected_language, token_counter
-        )
+    answer = await localize_answer(answer, detected_language, token_counter)
 
     logger.info(
-        f"Processed query. Main prompt tokens: {token_counter.main_prompt_tokens}, System tokens: {token_counter.system_tokens}, Output tokens: {token_counter.output_tokens}"
+        f"Processed query. Main prompt tokens: {token_counter.main_prompt_tokens}, Context tokens saved: {token_counter.context_tokens_saved}, System tokens: {token_counter.system_tokens}, Output tokens: {token_counter.output_tokens}"
     )
     return answer, detected_language, token_counter
 
 
+async def localize_answer(
+    answer: str, detected_language: str, token_counter: TokenCounter
+) -> str:
+    if detected_language == "en":
+        return answer
+    logger.info(f"Translating answer back to {detected_language}")
+    with span("translation"):
+        return await translate_text(
+            answer, "english", language_name(detected_language), token_counter
+        )
+
+
+async def understand_query(
+    text: str, token_counter: TokenCounter
+) -> tuple[str, str, bool, str] | None:
+    """Detect language, translate, check the domain and rewrite in one call.
+
+    Returns None when the response cannot be parsed, so the caller can fall
+    back to the separate detect/relevance/rewrite steps.
+    """
+    prompt = PromptTemplate(
+        input_variables=["text"],
+        template="""
+        Analyze the following user message sent to a New Zealand immigration and visa assistant.
+        Respond only with a JSON object with these keys, and without warm-up:
+        "language": detected language of the message, in English, lowercase
+        "translation": English translation of the message, or the original text if already in English
+        "related": true if the message is related to New Zealand immigration or visas, otherwise false
+        "search_query": the English message rephrased to be good for searching, or an empty string if not related
+
+        Text: {text}
+
+        JSON:
+        """,
+    )
+    chain = prompt | chat_model
+    with get_openai_callback() as cb:
+        response = await chain.ainvoke({"text": text})
+        token_counter.add_system_tokens(cb.total_tokens)
+
+    logger.info(f"Response from query understanding model: {response.content}")
+
+    match = re.search(r"\{.*\}", response.content, re.DOTALL)
+    if not match:
+        return None
+    try:
+        parsed = json.loads(match.group(0))
+        detected_language = str(parsed["language"]).strip().lower()
+        translation = str(parsed["translation"]).strip()
+        is_related = parsed["related"]
+        search_query = str(parsed.get("search_query") or "").strip()
+    except (json.JSONDecodeError, KeyError, TypeError):
+        return None
+    if isinstance(is_related, str):
+        is_related = is_related.strip().lower() in ("true", "yes")
+    if not detected_language or not translation:
+        return None
+
+    return detected_language, translation, bool(is_related), search_query
+
+
 async def detect_and_translate(
     text: str, token_counter: TokenCounter
 ) -> tuple[str, str]:
@@ -113,25 +297,22 @@ async def detect_and_translate(
     return detected_language, translation
 
 
+TRANSLATION_SYSTEM_PROMPT = """You are a translator for a New Zealand immigration and visa assistant.
+Translate the text you are given into the requested language, keeping markdown formatting and URLs unchanged.
+Respond only with translated text, and without warm-up."""
+
+
 async def translate_text(
     text: str, source_lang: str, target_lang: str, token_counter: TokenCounter
 ) -> str:
-    prompt = PromptTemplate(
-        input_variables=["text", "source_lang", "target_lang"],
-        template="""
-        Translate the following text from {source_lang} to {target_lang}:
-        Respond only with translated text, and without warm-up.
-        Text: {text}
-
-        Translation:
-        """,
-    )
-    chain = prompt | chat_model
-    with get_openai_callback() as cb:
-        response = await chain.ainvoke(
-            {"text": text, "source_lang": source_lang, "target_lang": target_lang}
-        )
-        token_counter.add_system_tokens(cb.total_tokens)
+    messages = [
+        cached_system_message(TRANSLATION_SYSTEM_PROMPT),
+        HumanMessage(
+            content=f"Translate the following text from {source_lang} to {target_lang}:\nText: {text}\n\nTranslation:"
+        ),
+    ]
+    response = await chat_model.ainvoke(messages)
+    token_counter.record_usage(response)
 
     logger.info(f"Response from translation model: {response}")
 
@@ -180,29 +361,118 @@ async def prepare_search_query(query: str, token_counter: TokenCounter) -> str:
 
 
 async def call_llm(prompt: str, token_counter: TokenCounter) -> str:
-    with get_openai_callback() as cb:
-        response = chat_model.invoke([HumanMessage(content=prompt)])
-        token_counter.add_main_prompt_tokens(cb.prompt_tokens)
-        token_counter.add_output_tokens(cb.completion_tokens)
+    response = await chat_model.ainvoke(main_messages(prompt))
+    token_counter.record_usage(response, main=True)
 
     return response.content
 
 
-def format_search_results(search_results: list) -> str:
+async def stream_llm(
+    prompt: str,
+    token_counter: TokenCounter,
+    on_partial: Callable[[str], Awaitable[None]],
+) -> str:
+    extractor = AnswerStreamExtractor()
+    response = None
+    async for chunk in chat_model.astream(main_messages(prompt)):
+        response = chunk if response is None else response + chunk
+        partial = extractor.feed(chunk.content)
+        if partial:
+            await on_partial(partial)
+
+    if response is None:
+        return ""
+    token_counter.record_usage(response, main=True)
+
+    return response.content
+
+
+class AnswerStreamExtractor:
+    """Incrementally extracts the text inside <answer> tags from a token stream.
+
+    `feed` returns the answer text visible so far, holding back anything that
+    could be the start of a tag, or None while no answer text is available.
+    """
+
+    OPEN_TAG = "<answer>"
+    CLOSE_TAG = "</answer>"
+
+    def __init__(self):
+        self.buffer = ""
+
+    def feed(self, text: str) -> str | None:
+        self.buffer += text
+        start = self.buffer.find(self.OPEN_TAG)
+        if start == -1:
+            return None
+        answer = self.buffer[start + len(self.OPEN_TAG) :]
+        end = answer.find(self.CLOSE_TAG)
+        if end != -1:
+            return answer[:end].strip() or None
+        # Drop a trailing partial closing tag such as "</ans"
+        for i in range(len(self.CLOSE_TAG) - 1, 0, -1):
+            if answer.endswith(self.CLOSE_TAG[:i]):
+                answer = answer[:-i]
+                break
+        return answer.strip() or None
+
+
+def format_search_results(
+    search_results: list, token_counter: TokenCounter | None = None
+) -> str:
+    blocks, tokens_saved = pack_context(
+        search_results, CONTEXT_MAX_TOKENS, count_tokens, CONTEXT_DEDUP_THRESHOLD
+    )
+    if token_counter:
+        token_counter.add_context_tokens_saved(tokens_saved)
+    logger.info(
+        f"Packed {len(search_results)} results into {len(blocks)} context blocks, "
+        f"saving {tokens_saved} tokens"
+    )
+
     formatted_results = ""
-    for result in search_results:
-        formatted_results += (
-            f"- {result.page_content}\n  URL: {result.metadata['_source']['url']}\n\n"
-        )
+    for block in blocks:
+        formatted_results += f"- {block['text']}\n  URL: {block['url']}\n\n"
     return formatted_results.strip()
 
 
-def build_prompt(query: str, search_results: list) -> str:
+MAIN_SYSTEM_PROMPT = """You are an AI assistant specializing in answering questions about New Zealand visas. Your knowledge comes from official New Zealand immigration information.
+
+You will be given information inside <context> tags and a question inside <question> tags.
+
+Guidelines for your answer:
+1. Analyze the question and identify the key points related to New Zealand visas.
+2. Use the provided information to formulate an accurate and up-to-date answer.
+3. Present a clear, concise response based on the official information.
+4. If the information is insufficient to fully answer the question, state this clearly and provide the most relevant details available.
+
+Write your answer using short markdown syntax, as it will be displayed in a Telegram chat. Follow these formatting guidelines:
+- Use **bold** for emphasis on key points.
+- Use *italics* for titles of documents or important terms.
+- Use bullet points or numbered lists for multiple items or steps.
+- Use `inline code` for specific visa codes or short official terms.
+
+Skip mention that you were searching answer in knowledge base, avoid this explanation.
+Always include at least one relevant URL as a reference. Format the URL reference at the end of your answer like this:
+[Source](URL)
+
+If multiple sources are used, include them as separate reference links at the end of your answer.
+
+Keep your answer concise and well-structured, using short paragraphs and appropriate markdown formatting to enhance readability.
+
+Provide your answer within <answer> tags."""
+
+
+def main_messages(prompt: str) -> list:
+    return [cached_system_message(MAIN_SYSTEM_PROMPT), HumanMessage(content=prompt)]
+
+
+def build_prompt(
+    query: str, search_results: list, token_counter: TokenCounter | None = None
+) -> str:
     prompt_template = PromptTemplate(
         input_variables=["query", "context"],
         template="""
-        You are an AI assistant specializing in answering questions about New Zealand visas. Your knowledge comes from official New Zealand immigration information.
-
         First, review the following information:
 
         <context>
@@ -215,30 +485,10 @@ def build_prompt(query: str, search_results: list) -> str:
         {query}
         </question>
 
-        Guidelines for your answer:
-        1. Analyze the question and identify the key points related to New Zealand visas.
-        2. Use the provided information to formulate an accurate and up-to-date answer.
-        3. Present a clear, concise response based on the official information.
-        4. If the information is insufficient to fully answer the question, state this clearly and provide the most relevant details available.
-
-        Write your answer using short markdown syntax, as it will be displayed in a Telegram chat. Follow these formatting guidelines:
-        - Use **bold** for emphasis on key points.
-        - Use *italics* for titles of documents or important terms.
-        - Use bullet points or numbered lists for multiple items or steps.
-        - Use `inline code` for specific visa codes or short official terms.
-
-        Skip mention that you were searching answer in knowledge base, avoid this explanation.
-        Always include at least one relevant URL as a reference. Format the URL reference at the end of your answer like this:
-        [Source](URL)
-
-        If multiple sources are used, include them as separate reference links at the end of your answer.
-
-        Keep your answer concise and well-structured, using short paragraphs and appropriate markdown formatting to enhance readability.
-
         Provide your answer within <answer> tags.
         """,
     )
-    context = format_search_results(search_results)
+    context = format_search_results(search_results, token_counter)
     return prompt_template.format(query=query, context=context)
 
 
@@ -250,42 +500,181 @@ def extract_answer(response: str) -> str:
         return response.strip()
 
 
+async def rerank_results(
+    query: str, search_results: list, token_counter: TokenCounter
+) -> list:
+    if RERANKER == "cross-encoder":
+        return await cross_encoder_rerank(query, search_results)
+    return await filter_relevant_results(query, search_results, token_counter)
+
+
 async def filter_relevant_results(
     query: str, search_results: list, token_counter: TokenCounter
 ) -> list[dict]:
-    relevant_results = []
-    for result in search_results:
-        is_relevant = await check_result_relevance(query, result, token_counter)
-        if is_relevant:
-            relevant_results.append(result)
-    return relevant_results
-
+    if RELEVANCE_MODE == "batch" and search_results:
+        verdicts = await check_results_relevance_batch(
+            query, search_results, token_counter
+        )
+        if verdicts is not None:
+            return [r for r, ok in zip(search_results, verdicts) if ok]
+        logger.error("Batch relevance check failed, falling back to per-result")
 
-async def check_result_relevance(
-    query: str, result, token_counter: TokenCounter
-) -> bool:
+    verdicts = await check_results_relevance_concurrent(
+        query, search_results, token_counter
+    )
+    return [r for r, ok in zip(search_results, verdicts) if ok]
+
+
+async def check_results_relevance_concurrent(
+    query: str,
+    search_results: list,
+    token_counter: TokenCounter,
+    concurrency: int = RELEVANCE_CONCURRENCY,
+    timeout: float = RELEVANCE_TIMEOUT,
+    max_results: int = RELEVANCE_MAX_RESULTS,
+    timeout_verdict: str = RELEVANCE_TIMEOUT_VERDICT,
+) -> list[bool]:
+    """Grade results in parallel, returning verdicts in the original order.
+
+    With `max_results` set, results that have not started grading yet are
+    skipped once that many top-ranked results are confirmed relevant. Calls
+    already in flight always finish so their tokens are still counted.
+
+    A call that exceeds `timeout` is not cancelled: it keeps running in the
+    background so its verdict still reaches the relevance cache, and is
+    tracked on `token_counter` so its tokens can be added to the dialog once
+    it finishes. Its result is kept or dropped per `timeout_verdict`.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    verdicts: list[bool | None] = [None] * len(search_results)
+    enough = asyncio.Event()
+
+    def prefix_is_full() -> bool:
+        relevant = 0
+        for verdict in verdicts:
+            if verdict is None:
+                return False
+            relevant += verdict
+            if relevant >= max_results:
+                return True
+        return False
+
+    async def grade(i: int, result):
+        async with semaphore:
+            if enough.is_set():
+                verdicts[i] = False
+                return
+            task = asyncio.create_task(
+                check_result_relevance(query, result, token_counter)
+            )
+            try:
+                verdicts[i] = await asyncio.wait_for(asyncio.shield(task), timeout)
+            except asyncio.TimeoutError:
+                token_counter.track(task)
+                verdicts[i] = timeout_verdict == "keep"
+                logger.error(
+                    f"Relevance check of {result.metadata['_id']} timed out after "
+                    f"{timeout}s, {'keeping' if verdicts[i] else 'dropping'} the result"
+                )
+        if max_results and prefix_is_full():
+            enough.set()
+
+    await asyncio.gather(*(grade(i, r) for i, r in enumerate(search_results)))
+    return verdicts
+
+
+async def check_results_relevance_batch(
+    query: str, search_results: list, token_counter: TokenCounter
+) -> list[bool] | None:
+    verdicts = [relevance_cache.get(relevance_key(query, r)) for r in search_results]
+    uncached = [r for r, verdict in zip(search_results, verdicts) if verdict is None]
+    if uncached:
+        fresh = await grade_results_batch(query, uncached, token_counter)
+        if fresh is None:
+            return None
+        fresh_iter = iter(fresh)
+        verdicts = [next(fresh_iter) if v is None else v for v in verdicts]
+        for result, verdict in zip(uncached, fresh):
+            relevance_cache.put(relevance_key(query, result), verdict)
+    return verdicts
+
+
+async def grade_results_batch(
+    query: str, search_results: list, token_counter: TokenCounter
+) -> list[bool] | None:
     prompt = PromptTemplate(
-        input_variables=["query", "result_content"],
+        input_variables=["query", "results"],
         template="""
-        Determine if the following search result is relevant to the given query about New Zealand immigration or visas.
-        Respond with only one word: 'Yes' or 'No'.
+        Determine which of the following search results are relevant to the given query about New Zealand immigration or visas.
+        Respond with only a JSON array of 'Yes' or 'No' strings, one per search result, in the same order.
 
         Query: {query}
 
-        Search Result:
-        {result_content}
+        Search Results:
+        {results}
 
-        Is this result relevant to the query?
+        JSON array:
         """,
     )
+    results = "\n\n".join(
+        f"[{i + 1}] {result.page_content}" for i, result in enumerate(search_results)
+    )
     chain = prompt | chat_model
-    with get_openai_callback() as cb:
-        response = await chain.ainvoke(
-            {"query": query, "result_content": result.page_content}
-        )
-        token_counter.add_system_tokens(cb.total_tokens)
-        logger.info(
-            f"Checking relevance of search result: {result.page_content} response: {response.content.strip().lower()}"
-        )
+    try:
+        with get_openai_callback() as cb:
+            response = await asyncio.wait_for(
+                chain.ainvoke({"query": query, "results": results}),
+                RELEVANCE_TIMEOUT,
+            )
+            token_counter.add_system_tokens(cb.total_tokens)
+    except asyncio.TimeoutError:
+        logger.error(f"Batch relevance check timed out after {RELEVANCE_TIMEOUT}s")
+        return None
 
-    return "yes" in response.content.strip().lower()
+    logger.info(f"Batch relevance response: {response.content.strip()}")
+    return parse_relevance_vector(response.content, len(search_results))
+
+
+def parse_relevance_vector(content: str, expected: int) -> list[bool] | None:
+    match = re.search(r"\[.*?\]", content, re.DOTALL)
+    if not match:
+        return None
+    try:
+        answers = json.loads(match.group(0))
+    except json.JSONDecodeError:
+        return None
+    if len(answers) != expected:
+        return None
+    return ["yes" in str(answer).lower() for answer in answers]
+
+
+RELEVANCE_SYSTEM_PROMPT = """Determine if the following search result is relevant to the given query about New Zealand immigration or visas.
+Respond with only one word: 'Yes' or 'No'."""
+
+
+def relevance_key(query: str, result) -> tuple[str, str]:
+    return normalize_query(query), result.metadata["_id"]
+
+
+async def check_result_relevance(
+    query: str, result, token_counter: TokenCounter
+) -> bool:
+    cached = relevance_cache.get(relevance_key(query, result))
+    if cached is not None:
+        return cached
+
+    messages = [
+        cached_system_message(RELEVANCE_SYSTEM_PROMPT),
+        HumanMessage(
+            content=f"Query: {query}\n\nSearch Result:\n{result.page_content}\n\nIs this result relevant to the query?"
+        ),
+    ]
+    response = await chat_model.ainvoke(messages)
+    token_counter.record_usage(response)
+    logger.info(
+        f"Checking relevance of search result: {result.page_content} response: {response.content.strip().lower()}"
+    )
+
+    is_relevant = "yes" in response.content.strip().lower()
+    relevance_cache.put(relevance_key(query, result), is_relevant)
+    return is_relevant
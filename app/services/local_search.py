@@ -0,0 +1,121 @@
+import json
+import os
+import pickle
+from collections import Counter
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+from utils.logger import logger
+
+
+class LocalSearchIndex:
+    """In-process replacement for the Elasticsearch kNN and keyword queries.
+
+    Holds a matrix of unit-normalised chunk embeddings for exact cosine kNN
+    and a sparse term-by-document TF-IDF matrix for lexical search. Results are returned as
+    Elasticsearch-shaped hits so they go through the same RRF fusion.
+    """
+
+    def __init__(self):
+        self.docs: list[dict] = []
+        self.ids: list[str] = []
+        self.vectors: np.ndarray | None = None
+        self.vectorizer: TfidfVectorizer | None = None
+        # One row per term so a query only touches the rows of its own terms
+        self.term_matrix: sparse.csr_matrix | None = None
+        self.corpus_hash = ""
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def fit(self, ids: list[str], docs: list[dict], vectors: list, corpus_hash: str):
+        self.ids = ids
+        self.docs = docs
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        self.vectors = matrix / np.where(norms == 0, 1, norms)
+        self.vectorizer = TfidfVectorizer(sublinear_tf=True)
+        self.term_matrix = (
+            self.vectorizer.fit_transform([doc["main_content"] for doc in docs])
+            .T.tocsr()
+            .astype(np.float32)
+        )
+        self.corpus_hash = corpus_hash
+        return self
+
+    def search(
+        self, query: str, vector: list[float], size: int = 20
+    ) -> tuple[list[dict], list[dict]]:
+        return self.knn_search(vector, size), self.keyword_search(query, size)
+
+    def knn_search(self, vector: list[float], size: int = 20) -> list[dict]:
+        query_vector = np.asarray(vector, dtype=np.float32)
+        query_vector /= np.linalg.norm(query_vector) or 1.0
+        return self._top_hits(self.vectors @ query_vector, size)
+
+    def keyword_search(self, query: str, size: int = 20) -> list[dict]:
+        return self._top_hits(self._keyword_scores(query), size, require_positive=True)
+
+    def save(self, path: str):
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "vectors.npy"), self.vectors)
+        sparse.save_npz(os.path.join(path, "term_matrix.npz"), self.term_matrix)
+        with open(os.path.join(path, "vectorizer.pkl"), "wb") as f_out:
+            pickle.dump(self.vectorizer, f_out)
+        with open(os.path.join(path, "docs.json"), "w") as f_out:
+            json.dump(
+                {"corpus_hash": self.corpus_hash, "ids": self.ids, "docs": self.docs},
+                f_out,
+                ensure_ascii=False,
+            )
+        logger.info(f"Saved local search index with {len(self)} chunks to {path}")
+
+    def load(self, path: str) -> bool:
+        try:
+            with open(os.path.join(path, "docs.json"), "r") as f_in:
+                data = json.load(f_in)
+            with open(os.path.join(path, "vectorizer.pkl"), "rb") as f_in:
+                self.vectorizer = pickle.load(f_in)
+            self.vectors = np.load(os.path.join(path, "vectors.npy"))
+            self.term_matrix = sparse.load_npz(os.path.join(path, "term_matrix.npz"))
+        except FileNotFoundError:
+            return False
+        self.corpus_hash = data["corpus_hash"]
+        self.ids = data["ids"]
+        self.docs = data["docs"]
+        logger.info(f"Loaded local search index with {len(self)} chunks from {path}")
+        return True
+
+    def _keyword_scores(self, query: str) -> np.ndarray:
+        # Same weighting as TfidfVectorizer.transform, without its per-call overhead
+        vocabulary = self.vectorizer.vocabulary_
+        counts = Counter(
+            vocabulary[term]
+            for term in self.vectorizer.build_analyzer()(query)
+            if term in vocabulary
+        )
+        if not counts:
+            return np.zeros(len(self.docs), dtype=np.float32)
+        rows = list(counts)
+        weights = (1 + np.log(list(counts.values()))) * self.vectorizer.idf_[rows]
+        weights /= np.linalg.norm(weights)
+        return np.asarray(weights @ self.term_matrix[rows]).ravel()
+
+    def _top_hits(
+        self, scores: np.ndarray, size: int, require_positive: bool = False
+    ) -> list[dict]:
+        size = min(size, len(scores))
+        if size == 0:
+            return []
+        top = np.argpartition(-scores, size - 1)[:size]
+        top = top[np.argsort(-scores[top])]
+        return [
+            {
+                "_id": self.ids[i],
+                "_score": float(scores[i]),
+                "_source": dict(self.docs[i]),
+            }
+            for i in top
+            if not require_positive or scores[i] > 0
+        ]
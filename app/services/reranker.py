@@ -0,0 +1,41 @@
+import asyncio
+
+from config import RERANKER_BATCH_SIZE, RERANKER_MODEL, RERANKER_THRESHOLD
+from utils.logger import logger
+
+_cross_encoder = None
+
+
+def get_cross_encoder():
+    global _cross_encoder
+    if _cross_encoder is None:
+        from sentence_transformers import CrossEncoder
+
+        _cross_encoder = CrossEncoder(RERANKER_MODEL, device="cpu")
+        logger.info(f"Loaded CrossEncoder model: {RERANKER_MODEL}")
+    return _cross_encoder
+
+
+def score_pairs(query: str, texts: list[str]) -> list[float]:
+    model = get_cross_encoder()
+    scores = model.predict(
+        [(query, text) for text in texts], batch_size=RERANKER_BATCH_SIZE
+    )
+    return [float(score) for score in scores]
+
+
+async def cross_encoder_rerank(
+    query: str, search_results: list, threshold: float = RERANKER_THRESHOLD
+) -> list:
+    """Score query–chunk pairs locally and keep those above `threshold`, best first."""
+    if not search_results:
+        return []
+
+    scores = await asyncio.to_thread(
+        score_pairs, query, [result.page_content for result in search_results]
+    )
+    ranked = sorted(zip(search_results, scores), key=lambda x: x[1], reverse=True)
+    for result, score in ranked:
+        logger.info(f"Cross-encoder score {score:.3f} for {result.metadata['_id']}")
+
+    return [result for result, score in ranked if score >= threshold]
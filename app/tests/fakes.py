@@ -0,0 +1,135 @@
+import asyncio
+import json
+import random
+import re
+import time
+from types import SimpleNamespace
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+class LatencyChatModel(BaseChatModel):
+    """Fake chat model that sleeps for a sampled latency and answers by prompt type."""
+
+    latency: float = 0.5
+    jitter: float = 0.2
+
+    @property
+    def _llm_type(self) -> str:
+        return "latency-fake"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self._sample_latency())
+        return self._result(messages)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self._sample_latency())
+        return self._result(messages)
+
+    def _sample_latency(self) -> float:
+        return max(0.0, random.gauss(self.latency, self.jitter * self.latency))
+
+    def _result(self, messages) -> ChatResult:
+        prompt = " ".join(str(message.content) for message in messages)
+        content = self._respond(prompt)
+        usage = {
+            "input_tokens": len(prompt) // 4,
+            "output_tokens": len(content) // 4,
+            "total_tokens": (len(prompt) + len(content)) // 4,
+        }
+        message = AIMessage(content=content, usage_metadata=usage)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    @staticmethod
+    def _respond(prompt: str) -> str:
+        if '"search_query"' in prompt:
+            text = prompt.rsplit("Text:", 1)[-1].split("JSON:")[0].strip()
+            return json.dumps(
+                {
+                    "language": "english",
+                    "translation": text,
+                    "related": True,
+                    "search_query": text,
+                }
+            )
+        if "JSON array" in prompt:
+            return json.dumps(["Yes"] * len(re.findall(r"^\s*\[\d+\] ", prompt, re.M)))
+        if "Translate" in prompt:
+            return prompt.rsplit("Text:", 1)[-1].replace("Translation:", "").strip()
+        if "<answer>" in prompt:
+            return "<answer>This is a synthetic answer. [Source](https://example.com)</answer>"
+        if "Language:" in prompt:
+            text = prompt.rsplit("Text:", 1)[-1].split("Response:")[0].strip()
+            return f"Language: english\nTranslation: {text}"
+        return "Yes"
+
+
+class FakeSentMessage:
+    def __init__(self, telegram_latency: float):
+        self.telegram_latency = telegram_latency
+        self.reply_markup = None
+
+    async def edit_text(self, text, **kwargs):
+        await asyncio.sleep(self.telegram_latency)
+        self.reply_markup = kwargs.get("reply_markup", self.reply_markup)
+
+    async def edit_reply_markup(self, reply_markup=None):
+        await asyncio.sleep(self.telegram_latency)
+        self.reply_markup = reply_markup
+
+
+class FakeMessage:
+    """Just enough of aiogram's Message for handle_message."""
+
+    def __init__(self, user_id: int, text: str, telegram_latency: float):
+        self.from_user = SimpleNamespace(id=user_id)
+        self.chat = SimpleNamespace(id=user_id)
+        self.text = text
+        self.telegram_latency = telegram_latency
+        self.bot = SimpleNamespace(send_chat_action=self._send_chat_action)
+        self.sent: list[FakeSentMessage] = []
+
+    async def _send_chat_action(self, chat_id, action):
+        await asyncio.sleep(self.telegram_latency)
+
+    async def answer(self, text, **kwargs):
+        await asyncio.sleep(self.telegram_latency)
+        sent = FakeSentMessage(self.telegram_latency)
+        sent.reply_markup = kwargs.get("reply_markup")
+        self.sent.append(sent)
+        return sent
+
+    def dialog_id(self) -> str | None:
+        for sent in reversed(self.sent):
+            if sent.reply_markup:
+                callback = sent.reply_markup.inline_keyboard[0][0].callback_data
+                return callback.split(":")[1]
+        return None
+
+
+class FakeCallbackQuery:
+    """Just enough of aiogram's CallbackQuery for handle_feedback."""
+
+    def __init__(self, user_id: int, data: str, message: FakeSentMessage):
+        self.from_user = SimpleNamespace(id=user_id)
+        self.data = data
+        self.message = message
+
+    async def answer(self, text=None, **kwargs):
+        await asyncio.sleep(self.message.telegram_latency)
+
+
+class FakeEmbeddings(Embeddings):
+    """Stands in for the HuggingFace model, which is downloaded on first use."""
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return [1.0, float(len(text) % 7), float(len(text.split()) % 5)]
@@ -0,0 +1,51 @@
+from services.chunking import (
+    ChunkStats,
+    compact_header,
+    estimate_tokens,
+    structured_chunks,
+)
+
+HEADER = "Home Visas Student visa Student visa Study in New Zealand."
+
+
+def test_compact_header_drops_repeated_title():
+    assert compact_header(HEADER) == "Home Visas Student visa Study in New Zealand."
+
+
+def test_structured_chunks_keep_sentences_whole():
+    content = " ".join(f"Sentence number {i} is here." for i in range(20))
+
+    chunks = structured_chunks(HEADER, content, max_tokens=40, header_max_tokens=10)
+
+    assert len(chunks) > 1
+    for text, tokens in chunks:
+        title, body = text.split("\n", 1)
+        assert title == "Home Visas Student visa Study in New Zealand."
+        assert body.startswith("Sentence number") and body.endswith("is here.")
+        assert tokens == estimate_tokens(text) <= 40
+    bodies = [text.split("\n", 1)[1] for text, _ in chunks]
+    assert " ".join(bodies) == content
+
+
+def test_structured_chunks_split_long_sentences_and_lines():
+    long_sentence = " ".join(["word"] * 50)
+    content = f"Heading\n{long_sentence}"
+
+    chunks = structured_chunks("", content, max_tokens=20)
+
+    assert chunks[0] == ("Heading", 1)
+    assert all(tokens <= 20 for _, tokens in chunks)
+    assert sum(text.count("word") for text, _ in chunks) == 50
+
+
+def test_chunk_stats_summary():
+    stats = ChunkStats()
+    for url, tokens in [("a", 10), ("a", 30), ("b", 20)]:
+        stats.add(url, tokens)
+
+    summary = stats.summary()
+
+    assert summary["pages"] == 2
+    assert summary["chunks"] == 3
+    assert summary["tokens"] == 60
+    assert summary["max_tokens"] == 30
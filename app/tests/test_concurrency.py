@@ -0,0 +1,82 @@
+import asyncio
+import importlib
+import time
+
+import langchain_huggingface
+import pytest
+from fakes import FakeEmbeddings, FakeMessage, LatencyChatModel
+from langchain_core.documents import Document
+
+LLM_LATENCY = 0.1
+REQUESTS = 50
+
+
+async def fake_search_documents(query: str) -> list[Document]:
+    return [
+        Document(
+            page_content=f"Visitor visa information {i}",
+            metadata={"_id": str(i), "_source": {"url": f"https://example.com/{i}"}},
+        )
+        for i in range(3)
+    ]
+
+
+@pytest.fixture
+def app_modules(monkeypatch, tmp_path):
+    # App modules read their settings and load the embedding model on import,
+    # so they are imported only once SQLite and a fake model are in place
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+    monkeypatch.setenv("DATABASE_URL", f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setenv("SEARCH_BACKEND", "local")
+    monkeypatch.setenv("SENTENCE_TRANSFORMERS_MODEL", "fake")
+    monkeypatch.setenv("EMBEDDING_STORE_PATH", str(tmp_path / "embeddings"))
+    monkeypatch.setattr(langchain_huggingface, "HuggingFaceEmbeddings", FakeEmbeddings)
+    handlers = importlib.import_module("bot.handlers")
+    models = importlib.import_module("database.models")
+    llm_service = importlib.import_module("services.llm_service")
+
+    monkeypatch.setattr(
+        llm_service,
+        "chat_model",
+        LatencyChatModel(latency=LLM_LATENCY, jitter=0.0),
+    )
+    monkeypatch.setattr(llm_service, "search_documents", fake_search_documents)
+    monkeypatch.setattr(llm_service, "answer_cache", None)
+    return handlers, models
+
+
+@pytest.mark.asyncio
+async def test_handle_message_runs_requests_concurrently(app_modules):
+    handlers, models = app_modules
+    await models.init_db()
+    messages = [
+        FakeMessage(i, f"How long does visitor visa {i} take?", 0.0)
+        for i in range(REQUESTS)
+    ]
+
+    start = time.perf_counter()
+    await asyncio.gather(*(handlers.handle_message(m) for m in messages))
+    elapsed = time.perf_counter() - start
+
+    # Every request makes several sequential LLM calls, so serialised handling
+    # would take at least REQUESTS * LLM_LATENCY
+    assert elapsed < REQUESTS * LLM_LATENCY / 4
+    assert all(message.dialog_id() is not None for message in messages)
+
+
+@pytest.mark.asyncio
+async def test_timed_out_relevance_checks_are_still_counted(app_modules):
+    llm_service = importlib.import_module("services.llm_service")
+    llm_service.relevance_cache.clear()
+    results = await fake_search_documents("slow")
+    token_counter = llm_service.TokenCounter()
+
+    verdicts = await llm_service.check_results_relevance_concurrent(
+        "slow", results, token_counter, timeout=0.01, timeout_verdict="drop"
+    )
+
+    assert verdicts == [False] * len(results)
+    assert token_counter.system_tokens == 0
+    await token_counter.wait_pending()
+    assert token_counter.system_tokens > 0
+    assert not token_counter.pending
@@ -0,0 +1,72 @@
+from langchain_core.documents import Document
+from services.chunking import estimate_tokens
+from services.context_packer import pack_context
+
+
+def result(url: str, chunk_index: int, text: str, score: float) -> Document:
+    return Document(
+        page_content=text,
+        metadata={
+            "_id": f"{url}#{chunk_index}",
+            "_fused_score": score,
+            "_source": {"url": url, "chunk_index": chunk_index},
+        },
+    )
+
+
+def test_pack_context_merges_pages_and_orders_by_score():
+    results = [
+        result("a", 1, "Student visa\nYou need an offer of place.", 0.02),
+        result("b", 0, "Work visa\nYou need a job offer from an employer.", 0.03),
+        result("a", 0, "Student visa\nStudy in New Zealand.", 0.01),
+    ]
+
+    blocks, saved = pack_context(results, max_tokens=1000)
+
+    assert [block["url"] for block in blocks] == ["b", "a"]
+    assert blocks[1]["text"] == (
+        "Student visa\nStudy in New Zealand. You need an offer of place."
+    )
+    assert blocks[1]["score"] == 0.02
+    # The repeated header line is the only saving
+    assert saved == estimate_tokens("Student visa")
+
+
+def test_pack_context_merges_overlapping_windows():
+    first = "Visitors can stay for up to nine months in New Zealand"
+    second = "up to nine months in New Zealand on a visitor visa."
+    results = [result("a", 0, first, 0.02), result("a", 1, second, 0.01)]
+
+    blocks, _ = pack_context(results, max_tokens=1000)
+
+    assert blocks[0]["text"] == (
+        "Visitors can stay for up to nine months in New Zealand on a visitor visa."
+    )
+
+
+def test_pack_context_drops_near_duplicates():
+    text = "Partners of New Zealand citizens can apply for a partner work visa."
+    results = [
+        result("a", 0, text, 0.03),
+        result("b", 0, text + " Apply online.", 0.02),
+        result("c", 0, "The fee depends on where you apply from.", 0.01),
+    ]
+
+    blocks, saved = pack_context(results, max_tokens=1000, dedup_threshold=0.8)
+
+    assert [block["url"] for block in blocks] == ["a", "c"]
+    assert saved == estimate_tokens(text + " Apply online.")
+
+
+def test_pack_context_enforces_token_budget():
+    results = [
+        result(str(i), 0, " ".join(["word"] * 40), 1 / (i + 1)) for i in range(5)
+    ]
+
+    blocks, saved = pack_context(results, max_tokens=115, dedup_threshold=1.1)
+
+    # The block crossing the budget is cut, unless only a few words would fit
+    assert [block["tokens"] for block in blocks] == [40, 40, 35]
+    assert saved == 5 * 40 - 115
+    blocks, _ = pack_context(results, max_tokens=100, dedup_threshold=1.1)
+    assert [block["tokens"] for block in blocks] == [40, 40]
@@ -0,0 +1,30 @@
+import json
+
+from services.corpus import iter_corpus
+
+
+def test_iter_corpus_streams_jsonl(tmp_path):
+    path = tmp_path / "site_content.jsonl"
+    records = [
+        {"url": "https://example.com/a", "header": "A", "main_content": "Alpha"},
+        {"url": "https://example.com/b", "header": "B", "main_content": "Beta"},
+        {"url": "https://example.com/a", "header": "A", "main_content": "Again"},
+    ]
+    lines = [json.dumps(record) + "\n" for record in records]
+    # A crawler still writing leaves an unfinished last line
+    path.write_text("".join(lines) + '{"url": "https://example.com/c", "hea')
+
+    pages = list(iter_corpus(str(path)))
+
+    assert pages == [
+        ("https://example.com/a", {"header": "A", "main_content": "Alpha"}),
+        ("https://example.com/b", {"header": "B", "main_content": "Beta"}),
+    ]
+
+
+def test_iter_corpus_reads_legacy_json(tmp_path):
+    legacy = {"https://example.com/a": {"header": "A", "main_content": "Alpha"}}
+    path = tmp_path / "site_content.json"
+    path.write_text(json.dumps(legacy))
+
+    assert dict(iter_corpus(str(path))) == legacy
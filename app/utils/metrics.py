@@ -0,0 +1,66 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from prometheus_client import Gauge, Histogram, start_http_server
+from prometheus_client.core import REGISTRY, GaugeMetricFamily
+
+STAGE_DURATION = Histogram(
+    "nz_visa_bot_stage_duration_seconds",
+    "Duration of each query processing stage",
+    ["stage"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "nz_visa_bot_requests_in_flight", "Messages currently being processed"
+)
+
+# Per-request stage durations, shared by every task spawned while handling it
+current_timings: ContextVar[dict[str, float] | None] = ContextVar(
+    "current_timings", default=None
+)
+
+
+@contextmanager
+def span(stage: str):
+    """Time a stage into the histogram and the current request's timings."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        STAGE_DURATION.labels(stage=stage).observe(duration)
+        timings = current_timings.get()
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + duration
+
+
+def start_request_timings() -> dict[str, float]:
+    timings = {}
+    current_timings.set(timings)
+    return timings
+
+
+class CacheCollector:
+    """Exposes hit/miss counters of the caches as gauges at scrape time."""
+
+    def __init__(self, get_stats):
+        self.get_stats = get_stats
+
+    def collect(self):
+        hit_rate = GaugeMetricFamily(
+            "nz_visa_bot_cache_hit_rate", "Cache hit rate", labels=["cache"]
+        )
+        size = GaugeMetricFamily(
+            "nz_visa_bot_cache_size", "Entries in the cache", labels=["cache"]
+        )
+        for name, stats in self.get_stats().items():
+            hit_rate.add_metric([name], stats["hit_rate"])
+            size.add_metric([name], stats["size"])
+        yield hit_rate
+        yield size
+
+
+def start_metrics_server(port: int, get_cache_stats):
+    REGISTRY.register(CacheCollector(get_cache_stats))
+    start_http_server(port)
@@ -15,6 +15,7 @@ class Index:
         keyword_fields (list): List of keyword field names to index.
         vectorizers (dict): Dictionary of TfidfVectorizer instances for each text field.
         keyword_df (pd.DataFrame): DataFrame containing keyword field data.
+        keyword_index (dict): Inverted index mapping each keyword field value to the positions of matching documents.
         text_matrices (dict): Dictionary of TF-IDF matrices for each text field.
         docs (list): List of documents indexed.
     """
@@ -33,6 +34,7 @@ class Index:
 
         self.vectorizers = {field: TfidfVectorizer(**vectorizer_params) for field in text_fields}
         self.keyword_df = None
+        self.keyword_index = {}
         self.text_matrices = {}
         self.docs = []
 
@@ -56,6 +58,13 @@ class Index:
 
         self.keyword_df = pd.DataFrame(keyword_data)
 
+        self.keyword_index = {}
+        for field in self.keyword_fields:
+            positions = {}
+            for i, value in enumerate(keyword_data[field]):
+                positions.setdefault(value, []).append(i)
+            self.keyword_index[field] = {value: np.array(idx) for value, idx in positions.items()}
+
         return self
 
     def search(self, query, filter_dict={}, boost_dict={}, num_results=10):
@@ -93,4 +102,61 @@ class Index:
         # Filter out zero-score results
         top_docs = [self.docs[i] for i in top_indices if scores[i] > 0]
 
-        return top_docs
\ No newline at end of file
+        return top_docs
+
+    def search_batch(self, queries, filter_dict={}, boost_dict={}, num_results=10):
+        """
+        Searches the index with many queries at once.
+
+        All queries are vectorized together and scored with one sparse matrix product per text field,
+        keyword filters are applied through the precomputed inverted index, and the top results are
+        selected row-wise with argpartition.
+
+        Args:
+            queries (list of str): The search query strings.
+            filter_dict (dict): Dictionary of keyword fields to filter by, applied to every query.
+            boost_dict (dict): Dictionary of boost scores for text fields.
+            num_results (int): The number of top results to return per query. Defaults to 10.
+
+        Returns:
+            list of list of dict: For each query, the documents matching the search criteria, ranked by relevance.
+        """
+        if not queries or not self.docs:
+            return [[] for _ in queries]
+
+        scores = np.zeros((len(queries), len(self.docs)))
+
+        # TF-IDF rows are L2-normalized, so the dot product is the cosine similarity
+        for field in self.text_fields:
+            query_matrix = self.vectorizers[field].transform(queries)
+            sim = (query_matrix @ self.text_matrices[field].T).toarray()
+            scores += sim * boost_dict.get(field, 1)
+
+        mask = self._filter_mask(filter_dict)
+        if mask is not None:
+            scores *= mask
+
+        num_results = min(num_results, len(self.docs))
+        top_indices = np.argpartition(-scores, num_results - 1, axis=1)[:, :num_results]
+        top_scores = np.take_along_axis(scores, top_indices, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top_indices = np.take_along_axis(top_indices, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        return [
+            [self.docs[i] for i, score in zip(row_indices, row_scores) if score > 0]
+            for row_indices, row_scores in zip(top_indices, top_scores)
+        ]
+
+    def _filter_mask(self, filter_dict):
+        """
+        Builds a boolean document mask for the keyword filters, or None if no filter applies.
+        """
+        mask = None
+        for field, value in filter_dict.items():
+            if field not in self.keyword_fields:
+                continue
+            field_mask = np.zeros(len(self.docs), dtype=bool)
+            field_mask[self.keyword_index[field].get(value, [])] = True
+            mask = field_mask if mask is None else mask & field_mask
+        return mask
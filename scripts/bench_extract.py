@@ -0,0 +1,91 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from extractors import EXTRACTORS, parse_page
+from fixture_server import FIXTURES_DIR
+
+BASE_URL = "https://www.immigration.govt.nz"
+
+
+def load_pages(directory):
+    pages = []
+    for root, _, files in os.walk(directory):
+        for name in sorted(files):
+            if name.endswith(".html"):
+                path = os.path.join(root, name)
+                url_path = os.path.relpath(path, directory)[: -len(".html")]
+                with open(path, "r", encoding="utf-8") as f:
+                    pages.append((f"{BASE_URL}/{url_path}", f.read()))
+    return pages
+
+
+def check_parity(pages, parse):
+    """URLs whose record or links differ from the BeautifulSoup extractor."""
+    return [url for url, html in pages if parse(url, html) != parse_page(url, html)]
+
+
+def pages_per_second(pages, parse, rounds, workers=0):
+    urls = [url for url, _ in pages] * rounds
+    htmls = [html for _, html in pages] * rounds
+    start = time.perf_counter()
+    if workers:
+        with ProcessPoolExecutor(workers) as pool:
+            chunksize = max(1, len(urls) // (workers * 4))
+            for _ in pool.map(parse, urls, htmls, chunksize=chunksize):
+                pass
+    else:
+        for url, html in zip(urls, htmls):
+            parse(url, html)
+    return len(urls) / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Check extractor parity and measure pages/sec on saved pages."
+    )
+    parser.add_argument(
+        "-d",
+        "--directory",
+        default=FIXTURES_DIR,
+        help="Directory with saved HTML pages (default: the fixture pages)",
+    )
+    parser.add_argument(
+        "-r",
+        "--rounds",
+        type=int,
+        default=200,
+        help="Times each page is parsed per measurement (default: 200)",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="Process pool size, 0 to skip the pool runs (default: CPU count)",
+    )
+    args = parser.parse_args()
+
+    pages = load_pages(args.directory)
+    print(f"Loaded {len(pages)} pages from {args.directory}")
+
+    mismatches = check_parity(pages, EXTRACTORS["lexbor"])
+    for url in mismatches:
+        print(f"Output differs from bs4: {url}")
+    print(f"Parity: {len(pages) - len(mismatches)}/{len(pages)} pages identical")
+
+    baseline = None
+    for name, parse in EXTRACTORS.items():
+        rate = pages_per_second(pages, parse, args.rounds)
+        baseline = baseline or rate
+        print(f"{name:>8}: {rate:8.0f} pages/s ({rate / baseline:.1f}x)")
+        if args.workers:
+            rate = pages_per_second(pages, parse, args.rounds, args.workers)
+            print(
+                f"{name:>8}: {rate:8.0f} pages/s with {args.workers} processes "
+                f"({rate / baseline:.1f}x)"
+            )
+
+    sys.exit(1 if mismatches else 0)
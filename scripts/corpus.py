@@ -0,0 +1,115 @@
+import argparse
+import json
+import os
+
+
+class CorpusWriter:
+    """Appends pages to a line-delimited JSON corpus as they are crawled.
+
+    Each line is one {"url", "header", "main_content"} object and is flushed
+    right away, so the indexer can read the file while the crawl runs.
+    """
+
+    def __init__(self, path, append=False):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.file = open(path, "a" if append else "w", encoding="utf-8")
+
+    def write(self, url, header, main_content):
+        record = {"url": url, "header": header, "main_content": main_content}
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class CorpusIndex:
+    """Random access to the pages of an existing corpus by URL.
+
+    Only byte offsets are kept in memory; a page is read from disk on demand.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.offsets = {}
+        if not os.path.exists(path):
+            return
+        with open(path, "rb") as f:
+            offset = 0
+            for line in f:
+                if line.endswith(b"\n") and line.strip():
+                    self.offsets.setdefault(json.loads(line)["url"], offset)
+                offset += len(line)
+
+    def __contains__(self, url):
+        return url in self.offsets
+
+    def get(self, url):
+        with open(self.path, "rb") as f:
+            f.seek(self.offsets[url])
+            return json.loads(f.readline())
+
+
+def iter_pages(path):
+    """Yield (url, page) pairs from a corpus in either format.
+
+    Same rules as the app's `iter_corpus`: an unfinished last line is
+    skipped, and if a URL appears twice (a resumed crawl may write a page
+    again) the first record wins, as in `CorpusIndex`.
+    """
+    if not path.endswith(".jsonl"):
+        with open(path, "r", encoding="utf-8") as f:
+            yield from json.load(f).items()
+        return
+    seen = set()
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.endswith("\n"):
+                break
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            url = record.pop("url")
+            if url not in seen:
+                seen.add(url)
+                yield url, record
+
+
+def convert(input_path, output_path):
+    count = 0
+    with CorpusWriter(output_path) as writer:
+        for url, page in iter_pages(input_path):
+            writer.write(url, page["header"], page["main_content"])
+            count += 1
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Convert site_content.json to the line-delimited corpus format."
+    )
+    parser.add_argument(
+        "-i",
+        "--input",
+        default="data/site_content.json",
+        help="Input JSON file (default: data/site_content.json)",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="data/site_content.jsonl",
+        help="Output JSONL file (default: data/site_content.jsonl)",
+    )
+    args = parser.parse_args()
+
+    count = convert(args.input, args.output)
+    print(f"Converted {count} pages from '{args.input}' to '{args.output}'")
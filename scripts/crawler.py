@@ -0,0 +1,374 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from parser import get_domain, should_skip_url
+
+import aiohttp
+from corpus import CorpusIndex, CorpusWriter
+from extractors import EXTRACTORS
+
+START_URL = "https://www.immigration.govt.nz/new-zealand-visas"
+
+
+class CrawlState:
+    """Frontier, seen set and fetched pages of a crawl, checkpointed to disk.
+
+    Page content goes to the corpus file; the state only keeps each page's
+    ETag, Last-Modified and outgoing links, so a later crawl can revalidate
+    pages with conditional requests and still follow links on a 304.
+    """
+
+    def __init__(self, start_url):
+        self.start_url = start_url
+        self.frontier = deque([start_url])
+        self.seen = {start_url}
+        self.visited = set()
+        self.pages = {}
+        self.finished = False
+
+    def add(self, url):
+        if url not in self.seen:
+            self.seen.add(url)
+            self.frontier.append(url)
+
+    def restart(self):
+        # New pass over the site that keeps the validators of known pages
+        self.frontier = deque([self.start_url])
+        self.seen = {self.start_url}
+        self.visited = set()
+        self.finished = False
+
+    def save(self, path, in_flight=()):
+        data = {
+            "start_url": self.start_url,
+            # Pages being fetched when the checkpoint is taken are retried
+            "frontier": list(in_flight) + list(self.frontier),
+            "seen": list(self.seen),
+            "visited": list(self.visited),
+            "pages": self.pages,
+            "finished": self.finished,
+        }
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        state = cls(data["start_url"])
+        state.frontier = deque(data["frontier"])
+        state.seen = set(data["seen"])
+        state.visited = set(data["visited"])
+        state.pages = data["pages"]
+        state.finished = data["finished"]
+        return state
+
+
+class HostLimiter:
+    """Caps concurrent requests per host and spaces out their start times."""
+
+    def __init__(self, per_host, delay):
+        self.semaphores = defaultdict(lambda: asyncio.Semaphore(per_host))
+        self.next_start = defaultdict(float)
+        self.delay = delay
+
+    @asynccontextmanager
+    async def slot(self, host):
+        async with self.semaphores[host]:
+            now = time.monotonic()
+            start = max(now, self.next_start[host])
+            self.next_start[host] = start + self.delay
+            await asyncio.sleep(start - now)
+            yield
+
+
+class Crawler:
+    """Crawls one site with a pool of workers sharing a FIFO frontier.
+
+    Pages with content are appended to `writer` as soon as they are parsed.
+    The state is checkpointed every `checkpoint_every` pages and when the
+    crawl stops for any reason, so an interrupted crawl resumes from the
+    checkpoint. Known pages are requested with If-None-Match and
+    If-Modified-Since, and on a 304 their record is copied from `previous`,
+    the corpus written by the last crawl.
+
+    HTML is parsed with `extractor`, one of EXTRACTORS. With `workers` set,
+    parsing runs in a process pool so it does not stall the fetching.
+    """
+
+    def __init__(
+        self,
+        state,
+        writer,
+        previous=None,
+        state_path=None,
+        concurrency=16,
+        per_host=4,
+        delay=0.1,
+        max_pages=None,
+        checkpoint_every=50,
+        timeout=30,
+        extractor="lexbor",
+        workers=0,
+    ):
+        self.state = state
+        self.writer = writer
+        self.previous = previous
+        self.state_path = state_path
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.limiter = HostLimiter(per_host, delay)
+        self.max_pages = max_pages
+        self.checkpoint_every = checkpoint_every
+        self.timeout = timeout
+        self.parse = EXTRACTORS[extractor]
+        self.workers = workers
+        self.executor = None
+        self.domain = get_domain(state.start_url)
+        self.in_flight = set()
+        self.condition = asyncio.Condition()
+        self.stats = {"fetched": 0, "not_modified": 0, "errors": 0, "written": 0}
+
+    async def run(self):
+        connector = aiohttp.TCPConnector(
+            limit=self.concurrency, limit_per_host=self.per_host
+        )
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        if self.workers:
+            self.executor = ProcessPoolExecutor(self.workers)
+        try:
+            async with aiohttp.ClientSession(
+                connector=connector, timeout=timeout
+            ) as session:
+                await asyncio.gather(
+                    *(self.worker(session) for _ in range(self.concurrency))
+                )
+            self.state.finished = not self.state.frontier
+        finally:
+            if self.executor:
+                self.executor.shutdown(cancel_futures=True)
+            self.checkpoint()
+        return self.stats
+
+    def limit_reached(self):
+        started = len(self.state.visited) + len(self.in_flight)
+        return self.max_pages is not None and started >= self.max_pages
+
+    async def worker(self, session):
+        while True:
+            async with self.condition:
+                # Pages in flight may still add links to an empty frontier
+                while not self.state.frontier and self.in_flight:
+                    await self.condition.wait()
+                if not self.state.frontier or self.limit_reached():
+                    return
+                url = self.state.frontier.popleft()
+                self.in_flight.add(url)
+
+            try:
+                await self.crawl_page(session, url)
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"Error parsing {url}: {e}")
+
+            async with self.condition:
+                self.in_flight.discard(url)
+                self.state.visited.add(url)
+                self.condition.notify_all()
+            if len(self.state.visited) % self.checkpoint_every == 0:
+                self.checkpoint()
+
+    async def crawl_page(self, session, url):
+        previous = self.state.pages.get(url)
+        headers = {}
+        # A 304 is only useful if the page's content can be copied over
+        if previous and (not previous["has_content"] or url in self.previous):
+            if previous["etag"]:
+                headers["If-None-Match"] = previous["etag"]
+            if previous["last_modified"]:
+                headers["If-Modified-Since"] = previous["last_modified"]
+
+        async with self.limiter.slot(get_domain(url)):
+            async with session.get(url, headers=headers) as response:
+                if response.status == 304 and headers:
+                    status, html = 304, None
+                else:
+                    response.raise_for_status()
+                    status, html = response.status, await response.text()
+                    etag = response.headers.get("ETag")
+                    last_modified = response.headers.get("Last-Modified")
+
+        if status == 304:
+            print(f"Not modified: {url}")
+            self.stats["not_modified"] += 1
+            page = previous
+            if page["has_content"]:
+                record = self.previous.get(url)
+                self.write(url, record["header"], record["main_content"])
+        else:
+            print(f"Parsing: {url}")
+            self.stats["fetched"] += 1
+            if self.executor:
+                content, links = await asyncio.get_running_loop().run_in_executor(
+                    self.executor, self.parse, url, html
+                )
+            else:
+                content, links = self.parse(url, html)
+            page = {
+                "links": links,
+                "etag": etag,
+                "last_modified": last_modified,
+                # Only pages with some content are saved, as before
+                "has_content": bool(content["header"] or content["main_content"]),
+            }
+            self.state.pages[url] = page
+            if page["has_content"]:
+                self.write(url, content["header"], content["main_content"])
+
+        for link in page["links"]:
+            if get_domain(link) == self.domain and not should_skip_url(link):
+                self.state.add(link)
+
+    def write(self, url, header, main_content):
+        self.writer.write(url, header, main_content)
+        self.stats["written"] += 1
+
+    def checkpoint(self):
+        if self.state_path:
+            self.state.save(self.state_path, self.in_flight)
+
+
+def load_state(start_url, state_path, fresh=False):
+    if fresh or not state_path or not os.path.exists(state_path):
+        return CrawlState(start_url)
+    state = CrawlState.load(state_path)
+    if state.finished:
+        print("Previous crawl finished, revalidating known pages")
+        state.restart()
+    else:
+        print(f"Resuming crawl with {len(state.frontier)} pages left in the frontier")
+    return state
+
+
+async def crawl(start_url, output_path, state_path=None, fresh=False, **kwargs):
+    """Crawl into the JSONL corpus at `output_path`, returning crawl statistics.
+
+    Pages are written to `<output_path>.partial`, which only replaces the
+    corpus once the crawl finishes, so the indexer never reads a half-crawled
+    corpus. Until then pages that are not modified are copied from the
+    current corpus.
+    """
+    state = load_state(start_url, state_path, fresh)
+    partial_path = f"{output_path}.partial"
+    resuming = bool(state.visited)
+
+    with CorpusWriter(partial_path, append=resuming) as writer:
+        crawler = Crawler(state, writer, CorpusIndex(output_path), state_path, **kwargs)
+        stats = await crawler.run()
+
+    if state.finished:
+        os.replace(partial_path, output_path)
+    return {**stats, "finished": state.finished}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Crawl the website concurrently into a JSONL corpus."
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="data/site_content.jsonl",
+        help="Output JSONL file (default: data/site_content.jsonl)",
+    )
+    parser.add_argument(
+        "-m",
+        "--max-pages",
+        type=int,
+        default=None,
+        help="Maximum number of pages to fetch (default: no limit)",
+    )
+    parser.add_argument(
+        "-c",
+        "--concurrency",
+        type=int,
+        default=16,
+        help="Requests in flight overall (default: 16)",
+    )
+    parser.add_argument(
+        "--per-host",
+        type=int,
+        default=4,
+        help="Requests in flight per host (default: 4)",
+    )
+    parser.add_argument(
+        "--delay",
+        type=float,
+        default=0.1,
+        help="Seconds between request starts per host (default: 0.1)",
+    )
+    parser.add_argument(
+        "--state",
+        default="data/crawl_state.json",
+        help="Checkpoint file (default: data/crawl_state.json)",
+    )
+    parser.add_argument(
+        "--fresh",
+        action="store_true",
+        help="Ignore the checkpoint and crawl from scratch",
+    )
+    parser.add_argument(
+        "--extractor",
+        choices=list(EXTRACTORS),
+        default="lexbor",
+        help="HTML extraction backend (default: lexbor)",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=0,
+        help="Processes for HTML parsing, 0 to parse in the crawler (default: 0)",
+    )
+    parser.add_argument("--start-url", default=START_URL)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    stats = asyncio.run(
+        crawl(
+            args.start_url,
+            args.output,
+            args.state,
+            args.fresh,
+            concurrency=args.concurrency,
+            per_host=args.per_host,
+            delay=args.delay,
+            max_pages=args.max_pages,
+            extractor=args.extractor,
+            workers=args.workers,
+        )
+    )
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"\nFetched {stats['fetched']} pages, {stats['not_modified']} not modified, "
+        f"{stats['errors']} errors in {elapsed:.1f}s"
+    )
+    print(f"Total unique pages analyzed with content: {stats['written']}")
+    if stats["finished"]:
+        print(f"\nResults saved to file '{args.output}'")
+    else:
+        print(
+            f"\nCrawl not finished, pages so far are in '{args.output}.partial'. "
+            "Run again to resume."
+        )
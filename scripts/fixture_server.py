@@ -0,0 +1,97 @@
+import argparse
+import hashlib
+import os
+import threading
+from contextlib import contextmanager
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "pages")
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Serves saved pages as a stand-in for immigration.govt.nz.
+
+    `/new-zealand-visas/visas` maps to `<directory>/new-zealand-visas/visas.html`.
+    Responses carry an ETag and Last-Modified, and conditional requests get a
+    304, so crawls can be tested offline including revalidation.
+    """
+
+    directory = FIXTURES_DIR
+
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        path = urlparse(self.path).path.strip("/")
+        file_path = os.path.join(self.directory, f"{path}.html")
+        if not path or not os.path.isfile(file_path):
+            self.send_error(404)
+            return
+
+        with open(file_path, "rb") as f:
+            body = f.read()
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        mtime = int(os.path.getmtime(file_path))
+
+        if self._not_modified(etag, mtime):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", formatdate(mtime, usegmt=True))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _not_modified(self, etag, mtime):
+        if "If-None-Match" in self.headers:
+            return self.headers["If-None-Match"] == etag
+        if "If-Modified-Since" in self.headers:
+            try:
+                since = parsedate_to_datetime(self.headers["If-Modified-Since"])
+            except (TypeError, ValueError):
+                return False
+            return mtime <= since.timestamp()
+        return False
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextmanager
+def serve_fixtures(directory=FIXTURES_DIR, port=0):
+    """Run the fixture server in a background thread and yield its base URL."""
+    handler = type("Handler", (FixtureHandler,), {"directory": directory})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server, f"http://127.0.0.1:{server.server_port}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Serve saved pages for offline crawls."
+    )
+    parser.add_argument(
+        "-p", "--port", type=int, default=8080, help="Port to listen on (default: 8080)"
+    )
+    parser.add_argument(
+        "-d", "--directory", default=FIXTURES_DIR, help="Directory with the saved pages"
+    )
+    args = parser.parse_args()
+
+    with serve_fixtures(args.directory, args.port) as (server, base_url):
+        print(f"Serving {args.directory} at {base_url}/new-zealand-visas")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
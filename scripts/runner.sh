@@ -1,2 +1,2 @@
 #!/bin/bash
-pipenv run python indexer.py "$@"
\ No newline at end of file
+cd "$(dirname "$0")/../app" && pipenv run python indexer.py "$@"
\ No newline at end of file
@@ -0,0 +1,42 @@
+import json
+
+from corpus import CorpusIndex, CorpusWriter, convert, iter_pages
+
+
+def test_convert_legacy_json(tmp_path):
+    legacy = {
+        "https://example.com/a": {"header": "A", "main_content": "Alpha"},
+        "https://example.com/b": {"header": "B", "main_content": "Beta"},
+    }
+    source = tmp_path / "site_content.json"
+    source.write_text(json.dumps(legacy))
+
+    assert convert(str(source), str(tmp_path / "site_content.jsonl")) == 2
+    assert dict(iter_pages(str(tmp_path / "site_content.jsonl"))) == legacy
+
+
+def test_corpus_index_reads_pages_by_url(tmp_path):
+    path = str(tmp_path / "corpus.jsonl")
+    with CorpusWriter(path) as writer:
+        writer.write("https://example.com/a", "A", "Alpha")
+        writer.write("https://example.com/b", "B", "Beta")
+
+    index = CorpusIndex(path)
+
+    assert "https://example.com/a" in index
+    assert "https://example.com/c" not in index
+    assert index.get("https://example.com/b")["main_content"] == "Beta"
+
+
+def test_iter_pages_keeps_first_record_of_a_url(tmp_path):
+    path = str(tmp_path / "corpus.jsonl")
+    with CorpusWriter(path) as writer:
+        writer.write("https://example.com/a", "A", "Alpha")
+        writer.write("https://example.com/a", "A", "Again")
+
+    pages = list(iter_pages(path))
+
+    assert pages == [
+        ("https://example.com/a", {"header": "A", "main_content": "Alpha"})
+    ]
+    assert CorpusIndex(path).get("https://example.com/a")["main_content"] == "Alpha"
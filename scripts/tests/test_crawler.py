@@ -0,0 +1,95 @@
+import json
+
+import pytest
+from corpus import CorpusIndex, iter_pages
+from crawler import CrawlState, crawl
+from fixture_server import serve_fixtures
+
+START_PATH = "/new-zealand-visas"
+CONTENT_PAGES = {
+    "/new-zealand-visas",
+    "/new-zealand-visas/visas",
+    "/new-zealand-visas/visas/visitor-visa",
+    "/new-zealand-visas/visas/student-visa",
+    "/new-zealand-visas/visas/work-visa",
+    "/new-zealand-visas/visas/work-visa?tab=conditions",
+    "/new-zealand-visas/preparing-a-visa-application/documents",
+}
+
+
+@pytest.fixture
+def site():
+    with serve_fixtures() as (server, base_url):
+        yield server, base_url
+
+
+def read_corpus(path, base_url):
+    return {url.removeprefix(base_url): page for url, page in iter_pages(path)}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "options",
+    [{"extractor": "bs4"}, {"extractor": "lexbor"}, {"workers": 2}],
+)
+async def test_crawl_finds_every_page_once(site, tmp_path, options):
+    server, base_url = site
+    output = str(tmp_path / "corpus.jsonl")
+    stats = await crawl(
+        base_url + START_PATH,
+        output,
+        str(tmp_path / "state.json"),
+        delay=0,
+        **options,
+    )
+
+    corpus = read_corpus(output, base_url)
+    assert set(corpus) == CONTENT_PAGES
+    assert stats["written"] == len(CONTENT_PAGES)
+    # Each URL is requested once; PDFs, opsmanual and other domains never are
+    assert len(server.requests) == len(set(server.requests))
+    assert not any("opsmanual" in p or p.endswith(".pdf") for p in server.requests)
+    assert stats["errors"] == 1  # the 404 footer link
+    page = corpus["/new-zealand-visas/visas/visitor-visa"]
+    assert page["header"].startswith("Visitor Visa")
+    assert "Up to 9 months" in page["main_content"]
+
+
+@pytest.mark.asyncio
+async def test_recrawl_revalidates_with_conditional_requests(site, tmp_path):
+    server, base_url = site
+    output = str(tmp_path / "corpus.jsonl")
+    state_path = str(tmp_path / "state.json")
+    await crawl(base_url + START_PATH, output, state_path, delay=0)
+    first = read_corpus(output, base_url)
+
+    stats = await crawl(base_url + START_PATH, output, state_path, delay=0)
+
+    assert read_corpus(output, base_url) == first
+    assert stats["fetched"] == 0
+    assert stats["not_modified"] == len(CONTENT_PAGES)
+    assert not (tmp_path / "corpus.jsonl.partial").exists()
+
+
+@pytest.mark.asyncio
+async def test_interrupted_crawl_resumes_from_checkpoint(site, tmp_path):
+    server, base_url = site
+    output = str(tmp_path / "corpus.jsonl")
+    state_path = str(tmp_path / "state.json")
+    await crawl(base_url + START_PATH, output, state_path, delay=0, max_pages=3)
+
+    with open(state_path) as f:
+        checkpoint = json.load(f)
+    assert not checkpoint["finished"]
+    assert len(checkpoint["visited"]) == 3
+    # Pages are streamed to the partial corpus, published only once finished
+    assert len(CorpusIndex(output + ".partial").offsets) == 3
+    assert not (tmp_path / "corpus.jsonl").exists()
+
+    await crawl(base_url + START_PATH, output, state_path, delay=0)
+
+    assert set(read_corpus(output, base_url)) == CONTENT_PAGES
+    assert not (tmp_path / "corpus.jsonl.partial").exists()
+    assert CrawlState.load(state_path).finished
+    # Pages fetched before the interruption are not requested again
+    assert len(server.requests) == len(set(server.requests))
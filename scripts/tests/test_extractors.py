@@ -0,0 +1,18 @@
+import pytest
+from bench_extract import load_pages
+from extractors import parse_page, parse_page_fast
+from fixture_server import FIXTURES_DIR
+
+PAGES = load_pages(FIXTURES_DIR)
+
+
+@pytest.mark.parametrize("url, html", PAGES, ids=[url for url, _ in PAGES])
+def test_fast_extractor_matches_beautifulsoup(url, html):
+    assert parse_page_fast(url, html) == parse_page(url, html)
+
+
+def test_fast_extractor_without_page_body():
+    html = "<html><body><header class='inz_page_header'>Title</header></body></html>"
+    assert parse_page_fast("https://example.com/", html) == parse_page(
+        "https://example.com/", html
+    )